@@ -0,0 +1,129 @@
+"""
+Measure CPU time per request spent turning list endpoint rows into a JSON body.
+
+"fastapi" is what FastAPI does for a route that returns the rows: validation and
+serialization through the response_model field (or jsonable_encoder when the
+route has none), then JSONResponse's json.dumps. "validated" and "trusted" are
+sparse_response(), which the list endpoints return, with and without
+re-validating the rows (see TRUSTED_READS).
+
+Usage:
+    python bench_serialization.py                  # 1000 rows, 200 rounds
+    python bench_serialization.py --rows 100 --rounds 1000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from server import client, Event, PaymentTransaction, sparse_response
+
+WORDS = "grace faith hope worship prayer community youth family sunday service revival outreach mission".split()
+
+
+def sentence(words: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def timestamp(days_ago: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago, minutes=random.randint(0, 1440))).isoformat()
+
+
+def event_rows(count: int) -> List[dict]:
+    return [{
+        "id": str(uuid.uuid4()),
+        "title": sentence(5),
+        "description": " ".join(sentence(14) for _ in range(4)),
+        "date": (datetime.now(timezone.utc) + timedelta(days=i)).date().isoformat(),
+        "time": "10:00 AM",
+        "location": "Faith Center, Main Hall",
+        "latitude": 17.385 + random.random() / 100,
+        "longitude": 78.486 + random.random() / 100,
+        "is_free": i % 3 != 0,
+        "image_url": f"https://images.example.com/events/{i}.jpg",
+        "uploaded_image": None,
+        "use_uploaded_image": False,
+        "brand_id": str(uuid.uuid4()),
+        "created_at": timestamp(i),
+    } for i in range(count)]
+
+
+def transaction_rows(count: int) -> List[dict]:
+    return [{
+        "id": str(uuid.uuid4()),
+        "session_id": f"cs_live_{uuid.uuid4().hex}",
+        "amount": round(random.uniform(5, 500), 2),
+        "currency": "usd",
+        "category": random.choice(["Tithes", "Offerings", "Missions", "Building Fund"]),
+        "category_id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "user_email": f"member{i}@example.com",
+        "donor_name": f"Member {i}",
+        "payment_status": random.choice(["paid", "pending", "expired"]),
+        "status": "completed",
+        "brand_id": str(uuid.uuid4()),
+        "metadata": {"source": "web", "campaign": "autumn"},
+        "created_at": timestamp(i),
+        "updated_at": timestamp(i),
+    } for i in range(count)]
+
+
+async def fastapi_default(model, rows, has_response_model: bool) -> bytes:
+    if has_response_model:
+        field = create_response_field(name=f"Response_{model.__name__}", type_=List[model])
+        content = await serialize_response(field=field, response_content=rows, is_coroutine=True)
+    else:
+        content = jsonable_encoder(rows)
+    return JSONResponse(content=content).body
+
+
+async def cpu_per_request(render, rounds: int) -> float:
+    await render()  # warm caches (TypeAdapter, schema builds)
+    start = time.process_time()
+    for _ in range(rounds):
+        await render()
+    return (time.process_time() - start) / rounds * 1000
+
+
+async def main(rows: int, rounds: int) -> None:
+    random.seed(7)
+    cases = [
+        ("GET /api/events", Event, event_rows(rows), True),
+        ("GET /api/payments/transactions", PaymentTransaction, transaction_rows(rows), False),
+    ]
+    print(f"{rows} rows, CPU ms per request (mean of {rounds})")
+    print(f"{'endpoint':<34}{'fastapi':>10}{'validated':>11}{'trusted':>10}{'speedup':>10}{'body KB':>10}")
+    for name, model, data, has_response_model in cases:
+        async def fastapi():
+            return await fastapi_default(model, data, has_response_model)
+
+        async def validated():
+            return sparse_response(model, data, None, trusted=False).body
+
+        async def trusted():
+            return sparse_response(model, data, None, trusted=True).body
+
+        fastapi_ms = await cpu_per_request(fastapi, rounds)
+        validated_ms = await cpu_per_request(validated, rounds)
+        trusted_ms = await cpu_per_request(trusted, rounds)
+        size = len(await trusted()) / 1024
+        print(f"{name:<34}{fastapi_ms:>10.2f}{validated_ms:>11.2f}{trusted_ms:>10.2f}{fastapi_ms / trusted_ms:>9.1f}x{size:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="rows per response")
+    parser.add_argument("--rounds", type=int, default=200, help="requests rendered per measurement")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.rows, args.rounds))
+    finally:
+        client.close()
@@ -0,0 +1,39 @@
+"""
+Image work that runs in ImageDerivatives' worker processes.
+
+Kept out of server.py so a worker only imports Pillow, not the API with its
+Mongo client and thread pools.
+"""
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+from PIL import Image, ImageOps
+
+
+def render_derivatives(source: str, digest: str, widths: List[int], quality: int) -> Dict[str, Any]:
+    """Write WebP copies of `source` at each width narrower than the original.
+
+    Runs in a worker process. Files go next to the source as <digest>-<width>w.webp;
+    the returned dict has the original size and the derivative filenames by width.
+    """
+    source_path = Path(source)
+    files = {}
+    with Image.open(source_path) as opened:
+        width, height = opened.size
+        if getattr(opened, "is_animated", False):
+            return {"width": width, "height": height, "files": files}
+        image = ImageOps.exif_transpose(opened)
+        width, height = image.size
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.mode in ("LA", "PA") or "transparency" in image.info else "RGB")
+        for target in widths:
+            if target >= width:
+                break
+            resized = image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+            name = f"{digest}-{target}w.webp"
+            partial = source_path.with_name(f".{name}.{os.getpid()}")
+            resized.save(partial, "WEBP", quality=quality, method=4)
+            os.replace(partial, source_path.with_name(name))
+            files[str(target)] = name
+    return {"width": width, "height": height, "files": files}
@@ -0,0 +1,43 @@
+"""
+Create the MongoDB indexes declared in server.INDEX_SPECS and report drift.
+
+Usage:
+    python manage_indexes.py               # create missing indexes, report remaining drift
+    python manage_indexes.py --check       # only report drift, exit code 1 if any
+    python manage_indexes.py --drop-extra  # also drop indexes that are not declared
+"""
+import argparse
+import asyncio
+import sys
+
+from server import client, db, check_index_drift, ensure_indexes
+
+
+async def main(check_only: bool, drop_extra: bool) -> int:
+    if check_only:
+        drift = await check_index_drift(db)
+    else:
+        drift = await ensure_indexes(db, drop_extra=drop_extra)
+
+    if not drift:
+        print("✅ All declared indexes are present, no drift")
+        return 0
+
+    for collection, report in sorted(drift.items()):
+        print(f"⚠️  {collection}")
+        for kind in ("missing", "extra", "mismatched"):
+            for name in report[kind]:
+                print(f"   - {kind}: {name}")
+    return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="report drift without creating indexes")
+    parser.add_argument("--drop-extra", action="store_true", help="drop indexes that are not declared")
+    args = parser.parse_args()
+    try:
+        exit_code = asyncio.run(main(args.check, args.drop_extra))
+    finally:
+        client.close()
+    sys.exit(exit_code)
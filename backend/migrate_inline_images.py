@@ -0,0 +1,152 @@
+"""
+Move inline base64 images (data:image/...;base64,...) out of documents and into the upload store.
+
+Every collection is scanned in _id order, including nested fields such as
+content_blocks[].image_url and gallery_images[]. Each blob is decoded into the
+content-addressed store and the field is rewritten to its /api/uploads/... URL.
+Progress is checkpointed in the `migrations` collection after every batch, so
+an interrupted run picks up where it stopped.
+
+Usage:
+    python migrate_inline_images.py                 # migrate, resuming from the last checkpoint
+    python migrate_inline_images.py --dry-run       # only report what would be reclaimed
+    python migrate_inline_images.py --restart       # ignore the checkpoint and rescan everything
+    python migrate_inline_images.py --batch-size 50 --collection blogs
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import re
+import sys
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from pymongo import UpdateOne
+
+from server import client, db, image_store, image_derivatives
+
+MIGRATION_ID = "inline-images"
+
+# Collections that hold the store itself or migration bookkeeping
+SKIPPED_COLLECTIONS = {"uploads", "migrations"}
+
+DATA_URL = re.compile(r"^data:image/[\w.+-]+;base64,", re.IGNORECASE)
+
+
+def find_inline_images(value, path=""):
+    """Yield (dotted path, data URL) for every inline image inside a document"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key != "_id":
+                yield from find_inline_images(item, f"{path}.{key}" if path else key)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from find_inline_images(item, f"{path}.{index}")
+    elif isinstance(value, str) and DATA_URL.match(value):
+        yield path, value
+
+
+async def store_data_url(data_url: str, new_images: list) -> str:
+    content = base64.b64decode(data_url.partition(",")[2], validate=False)
+    stored = await image_store.put(content, None)
+    if stored.get("derivatives_status") != "ready":
+        new_images.append(stored)
+    return stored["url"]
+
+
+async def migrate_collection(name: str, state: dict, batch_size: int, dry_run: bool) -> dict:
+    collection = db[name]
+    query = {"_id": {"$gt": state["last_id"]}} if state.get("last_id") is not None else {}
+    while True:
+        batch = await collection.find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        operations = []
+        new_images = []
+        for document in batch:
+            updates = {}
+            for path, data_url in find_inline_images(document):
+                try:
+                    url = data_url if dry_run else await store_data_url(data_url, new_images)
+                except (binascii.Error, ValueError, HTTPException) as e:
+                    state["failed"] += 1
+                    print(f"   ⚠️  {name} {document['_id']} {path}: {getattr(e, 'detail', e)}")
+                    continue
+                updates[path] = url
+                state["fields"] += 1
+                state["bytes_reclaimed"] += len(data_url) - (0 if dry_run else len(url))
+            if updates:
+                state["documents"] += 1
+                operations.append(UpdateOne({"_id": document["_id"]}, {"$set": updates}))
+
+        state["scanned"] += len(batch)
+        state["last_id"] = batch[-1]["_id"]
+        query = {"_id": {"$gt": state["last_id"]}}
+        if dry_run:
+            continue
+
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+        if new_images:
+            await asyncio.gather(*(image_derivatives.build(upload) for upload in new_images))
+        await save_checkpoint(name, state)
+
+    state["done"] = True
+    if not dry_run:
+        await save_checkpoint(name, state)
+    return state
+
+
+async def save_checkpoint(name: str, state: dict) -> None:
+    await db.migrations.update_one(
+        {"id": MIGRATION_ID},
+        {"$set": {f"collections.{name}": state, "updated_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True,
+    )
+
+
+async def main(batch_size: int, dry_run: bool, restart: bool, only: list) -> int:
+    checkpoint = {} if restart or dry_run else await db.migrations.find_one({"id": MIGRATION_ID}) or {}
+    previous = checkpoint.get("collections", {})
+    names = only or sorted(set(await db.list_collection_names()) - SKIPPED_COLLECTIONS)
+
+    failed = 0
+    print(f"{'collection':<24}{'scanned':>10}{'documents':>11}{'fields':>8}{'reclaimed':>14}")
+    for name in names:
+        state = previous.get(name) or {}
+        if not state.get("done"):
+            state = await migrate_collection(name, {
+                "last_id": state.get("last_id"),
+                "scanned": state.get("scanned", 0),
+                "documents": state.get("documents", 0),
+                "fields": state.get("fields", 0),
+                "failed": state.get("failed", 0),
+                "bytes_reclaimed": state.get("bytes_reclaimed", 0),
+            }, batch_size, dry_run)
+        failed += state["failed"]
+        print(f"{name:<24}{state['scanned']:>10}{state['documents']:>11}{state['fields']:>8}{state['bytes_reclaimed'] / 1024 / 1024:>11.2f} MB")
+
+    if dry_run:
+        print("Dry run, nothing was written")
+    elif failed:
+        print(f"⚠️  {failed} inline images could not be decoded and were left in place")
+    else:
+        print("✅ No inline images left")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=100, help="documents read and written per round trip")
+    parser.add_argument("--dry-run", action="store_true", help="report inline images without moving them")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    parser.add_argument("--collection", action="append", default=[], help="only migrate this collection (repeatable)")
+    args = parser.parse_args()
+    try:
+        exit_code = asyncio.run(main(args.batch_size, args.dry_run, args.restart, args.collection))
+    finally:
+        image_derivatives.shutdown()
+        client.close()
+    sys.exit(exit_code)
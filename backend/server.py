@@ -1,18 +1,43 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request, Response, UploadFile, File, Query, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
+import asyncio
 import logging
+import time
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter, create_model
+import pydantic_core
+from typing import List, Optional, Dict, Any, Set, Type, AsyncIterator
+from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
 import uuid
-from datetime import datetime, timezone, timedelta
+import random
+from datetime import date, datetime, timezone, timedelta
+from enum import Enum
 import bcrypt
+import requests
+import stripe
 import jwt
 import base64
+import json
+import hashlib
+import html
+import bisect
+import mimetypes
+import re
+from urllib.parse import parse_qsl, urlencode
+from email.utils import formatdate
+from image_worker import render_derivatives
 from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
 
 ROOT_DIR = Path(__file__).parent
@@ -132,6 +157,7 @@ class Event(BaseModel):
     registration_enabled: bool = True  # Enable/disable registration for this event
     custom_registration_fields: Optional[List[Dict[str, Any]]] = []  # Dynamic field configuration
     registration_deadline: Optional[str] = None  # Optional registration deadline date
+    srcsets: Dict[str, Dict[str, str]] = {}  # Derivative URLs by width for each stored image, filled in on read
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 class EventCreate(BaseModel):
@@ -186,6 +212,7 @@ class Ministry(BaseModel):
     uploaded_image: Optional[str] = None  # Path to uploaded image
     use_uploaded_image: bool = False  # Whether to use uploaded image or URL
     brand_id: str
+    srcsets: Dict[str, Dict[str, str]] = {}  # Derivative URLs by width for each stored image, filled in on read
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 class MinistryCreate(BaseModel):
@@ -363,6 +390,7 @@ class Gallery(BaseModel):
     image_url: str
     event_id: Optional[str] = None
     brand_id: str
+    srcsets: Dict[str, Dict[str, str]] = {}  # Derivative URLs by width for each stored image, filled in on read
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 class GalleryCreate(BaseModel):
@@ -492,6 +520,7 @@ class Foundation(BaseModel):
     raised_amount: float = 0.0
     is_active: bool = True
     brand_id: str
+    srcsets: Dict[str, Dict[str, str]] = {}  # Derivative URLs by width for each stored image, filled in on read
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 class FoundationCreate(BaseModel):
@@ -536,6 +565,7 @@ class ContentBlock(BaseModel):
     image_url: Optional[str] = None  # For image blocks
     alignment: Optional[str] = "left"  # "left", "right", "center"
     order: int = 0  # Order in the blog post
+    srcset: Optional[Dict[str, str]] = None  # Derivative URLs of image_url by width, filled in on read
 
 class Blog(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -548,9 +578,13 @@ class Blog(BaseModel):
     image_url: Optional[str] = None  # Featured image
     brand_id: str
     published: bool = True
+    srcsets: Dict[str, Dict[str, str]] = {}  # Derivative URLs by width for each stored image, filled in on read
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
+# Filled in on read by attach_srcsets, never stored (content blocks echoed back by an editor carry them)
+BLOG_READ_ONLY_FIELDS = {"srcsets": True, "content_blocks": {"__all__": {"srcset"}}}
+
 class BlogCreate(BaseModel):
     title: str
     content: str
@@ -606,6 +640,698 @@ class CountdownUpdate(BaseModel):
     is_active: Optional[bool] = None
     priority: Optional[int] = None
 
+# ========== INDEX MANAGEMENT ==========
+
+# Every collection the API reads or writes; all of them are looked up by `id`
+INDEXED_COLLECTIONS = [
+    "admins", "brands", "events", "event_attendees", "ministries", "announcements",
+    "subscribers", "contact_messages", "sermons", "testimonials", "prayer_requests",
+    "donations", "gallery", "users", "giving_categories", "payment_transactions",
+    "live_streams", "foundations", "foundation_donations", "blogs", "countdowns",
+    "uploads", "migrations", "webhook_events", "idempotency_keys", "foundation_counters",
+]
+
+# Collections served by brand-filtered list endpoints
+BRAND_LISTED_COLLECTIONS = [
+    "events", "event_attendees", "ministries", "announcements", "subscribers",
+    "contact_messages", "sermons", "testimonials", "prayer_requests", "donations",
+    "gallery", "users", "giving_categories", "payment_transactions", "live_streams",
+    "foundations", "blogs", "countdowns",
+]
+
+# Collections behind /api/search: text index weights, the fields a snippet is cut from
+# (in order of preference) and a filter every hit must also match
+SEARCH_SOURCES = {
+    "sermons": {
+        "weights": {"title": 10, "speaker": 5, "description": 3, "transcript": 1},
+        "snippet_fields": ["description", "transcript"],
+        "filter": {},
+    },
+    "blogs": {
+        "weights": {"title": 10, "excerpt": 5, "content": 2, "content_blocks.content": 2},
+        "snippet_fields": ["excerpt", "content"],
+        "filter": {"published": True},
+    },
+    "announcements": {
+        "weights": {"title": 10, "content": 3, "location": 1},
+        "snippet_fields": ["content"],
+        "filter": {},
+    },
+    "events": {
+        "weights": {"title": 10, "description": 3, "location": 2},
+        "snippet_fields": ["description", "location"],
+        "filter": {},
+    },
+}
+
+# Options that make two indexes on the same keys behave differently
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+def build_index_specs() -> Dict[str, List[IndexModel]]:
+    specs: Dict[str, List[IndexModel]] = {
+        name: [IndexModel([("id", ASCENDING)], unique=True)] for name in INDEXED_COLLECTIONS
+    }
+    # List endpoints page on (created_at, id), see paginate()
+    for name in BRAND_LISTED_COLLECTIONS:
+        specs[name].append(IndexModel([("brand_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]))
+        specs[name].append(IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]))
+    specs["countdowns"].append(IndexModel([("brand_id", ASCENDING), ("priority", DESCENDING), ("id", DESCENDING)]))
+    specs["event_attendees"].append(IndexModel([("event_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]))
+    specs["foundation_donations"].append(IndexModel([("foundation_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]))
+    specs["foundation_counters"].append(IndexModel([("foundation_id", ASCENDING)]))
+    specs["payment_transactions"].append(IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]))
+    specs["payment_transactions"].append(IndexModel([("session_id", ASCENDING)], unique=True))
+    specs["payment_transactions"].append(IndexModel([("payment_status", ASCENDING), ("brand_id", ASCENDING), ("created_at", DESCENDING)]))
+    specs["payment_transactions"].append(IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]))
+    specs["webhook_events"].append(IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]))
+    specs["webhook_events"].append(IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]))
+    specs["idempotency_keys"].append(IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0))
+    specs["announcements"].append(IndexModel([("brand_id", ASCENDING), ("is_urgent", ASCENDING), ("scheduled_start", ASCENDING), ("scheduled_end", ASCENDING)]))
+    specs["donations"].append(IndexModel([("brand_id", ASCENDING), ("date", ASCENDING)]))
+    specs["users"].append(IndexModel([("email", ASCENDING)], unique=True))
+    specs["admins"].append(IndexModel([("email", ASCENDING)], unique=True))
+    # /api/search, see SEARCH_SOURCES
+    for collection, source in SEARCH_SOURCES.items():
+        specs[collection].append(IndexModel(
+            [(field, TEXT) for field in source["weights"]],
+            weights=source["weights"],
+            name=f"{collection}_search",
+        ))
+    return specs
+
+INDEX_SPECS = build_index_specs()
+
+def _index_signature(index: Dict[str, Any]) -> tuple:
+    """Normalize a declared IndexModel document or an index_information() entry"""
+    keys = index["key"].items() if isinstance(index["key"], dict) else index["key"]
+    key = tuple((field, int(direction) if isinstance(direction, (int, float)) else direction) for field, direction in keys)
+    options = tuple((option, index[option]) for option in INDEX_OPTIONS if option in index)
+    if any(direction == TEXT for _, direction in key):
+        # Mongo reports a text index as _fts/_ftsx keys with the indexed fields in `weights`
+        weights = {field: 1 for field, direction in key if direction == TEXT and field != "_fts"}
+        weights.update(index.get("weights", {}))
+        key = tuple(item for item in key if item[1] != TEXT and item[0] not in ("_fts", "_ftsx"))
+        key += ((TEXT, tuple(sorted(weights.items()))),)
+    return key, options
+
+async def check_index_drift(database) -> Dict[str, Dict[str, List[str]]]:
+    """Compare the live indexes against INDEX_SPECS.
+
+    Returns only collections that drifted, each with the names of declared indexes
+    that are missing, indexes that exist but are not declared, and indexes whose
+    keys or options differ from the declaration.
+    """
+    drift = {}
+    for collection, models in INDEX_SPECS.items():
+        declared = {model.document["name"]: _index_signature(model.document) for model in models}
+        existing = await database[collection].index_information()
+        existing.pop("_id_", None)
+        report = {
+            "missing": sorted(name for name in declared if name not in existing),
+            "extra": sorted(name for name in existing if name not in declared),
+            "mismatched": sorted(
+                name for name in declared
+                if name in existing and _index_signature(existing[name]) != declared[name]
+            ),
+        }
+        if any(report.values()):
+            drift[collection] = report
+    return drift
+
+async def ensure_indexes(database, drop_extra: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """Create every declared index and return the drift that remains afterwards"""
+    for collection, models in INDEX_SPECS.items():
+        try:
+            await database[collection].create_indexes(models)
+        except OperationFailure as e:
+            logger.error(f"Failed to create indexes on {collection}: {e}")
+    drift = await check_index_drift(database)
+    if drop_extra:
+        for collection, report in drift.items():
+            for name in report["extra"]:
+                await database[collection].drop_index(name)
+                logger.info(f"Dropped undeclared index {collection}.{name}")
+        drift = await check_index_drift(database)
+    return drift
+
+# Unique indexes that deduplication depends on: without them a repeated Idempotency-Key
+# or Stripe event is simply inserted again and processed twice
+DEDUP_INDEXES = {"idempotency_keys": "id", "webhook_events": "id"}
+verified_dedup_indexes: Set[str] = set()
+
+async def has_unique_index(collection, field: str) -> bool:
+    indexes = await collection.index_information()
+    return any(spec.get("unique") and [key for key, _ in spec["key"]] == [field] for spec in indexes.values())
+
+async def require_dedup_index(collection: str) -> None:
+    """Refuse with 503 unless `collection` has the unique index its deduplication relies on.
+
+    Checked against Mongo until it is found once, so an index created after startup
+    (python manage_indexes.py) is picked up without a restart.
+    """
+    if collection in verified_dedup_indexes:
+        return
+    if await has_unique_index(getattr(db, collection), DEDUP_INDEXES[collection]):
+        verified_dedup_indexes.add(collection)
+        return
+    logger.error(f"{collection} has no unique index on {DEDUP_INDEXES[collection]}; refusing writes that depend on it")
+    raise HTTPException(status_code=503, detail="Duplicate protection is unavailable, try again later")
+
+# ========== PAGINATION ==========
+
+# Without ?limit= a list endpoint returns as many rows as it did before it paged,
+# since the frontend doesn't follow X-Next-Cursor; smaller pages are opt-in
+DEFAULT_PAGE_LIMIT = 1000
+SHORT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class PageParams(BaseModel):
+    limit: int
+    after: Optional[List[Any]] = None  # [sort value, id] of the last row already returned
+
+def encode_cursor(value: Any, doc_id: str) -> str:
+    raw = json.dumps([value, doc_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # The sort value goes into the query as is, so anything but a scalar (an operator
+    # document such as {"$regex": ...}) is rejected
+    if (not isinstance(after, list) or len(after) != 2 or not isinstance(after[1], str)
+            or isinstance(after[0], bool) or not isinstance(after[0], (str, int, float, type(None)))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after
+
+@lru_cache(maxsize=None)
+def page_params_with_default(default_limit: int):
+    """Build the ?limit=&cursor= dependency for endpoints whose pages default to `default_limit` rows"""
+    def page_params(
+        limit: int = Query(default_limit, ge=1, le=MAX_PAGE_LIMIT),
+        cursor: Optional[str] = Query(None, description=f"Opaque value from the {NEXT_CURSOR_HEADER} response header")
+    ) -> PageParams:
+        return PageParams(limit=limit, after=decode_cursor(cursor) if cursor else None)
+
+    return page_params
+
+page_params = page_params_with_default(DEFAULT_PAGE_LIMIT)
+short_page_params = page_params_with_default(SHORT_PAGE_LIMIT)
+
+async def paginate(
+    collection,
+    query: Dict[str, Any],
+    page: PageParams,
+    response: Response,
+    projection: Optional[Dict[str, Any]] = None,
+    sort_field: str = "created_at"
+) -> List[Dict[str, Any]]:
+    """Fetch one keyset page ordered by (sort_field, id), newest first.
+
+    Reads at most limit + 1 documents off the Motor cursor; the extra one only tells
+    us whether another page exists, in which case its cursor goes into the
+    X-Next-Cursor response header.
+    """
+    if page.after is not None:
+        value, doc_id = page.after
+        keyset = {"$or": [{sort_field: {"$lt": value}}, {sort_field: value, "id": {"$lt": doc_id}}]}
+        query = {"$and": [query, keyset]} if query else keyset
+
+    # A sparse fieldset still needs the sort key to build the next cursor
+    strip_sort_field = bool(projection) and 1 in projection.values() and sort_field not in projection
+    if strip_sort_field:
+        projection = {**projection, sort_field: 1}
+
+    cursor = collection.find(query, projection or {"_id": 0})
+    cursor = cursor.sort([(sort_field, DESCENDING), ("id", DESCENDING)]).limit(page.limit + 1)
+    items = []
+    async for doc in cursor:
+        items.append(doc)
+
+    if len(items) > page.limit:
+        items.pop()
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.get(sort_field), last["id"])
+    if strip_sort_field:
+        for doc in items:
+            doc.pop(sort_field, None)
+    return items
+
+# ========== FAST JSON ==========
+
+def render_json(content: Any) -> bytes:
+    """Serialize plain JSON-compatible data with pydantic-core's serializer instead of json.dumps"""
+    return pydantic_core.to_json(content)
+
+class FastJSONResponse(Response):
+    """application/json response for a body that is already serialized"""
+    media_type = "application/json"
+
+@lru_cache(maxsize=None)
+def response_adapter(model: Type[BaseModel], many: bool) -> TypeAdapter:
+    return TypeAdapter(List[model] if many else model)
+
+# Documents read back from Mongo were validated when they were written, so by default
+# they are only shaped to the model's fields on the way out. TRUSTED_READS=false
+# validates every row again, which is useful when tracking down bad data.
+TRUSTED_READS = os.environ.get('TRUSTED_READS', 'true').lower() != 'false'
+
+@lru_cache(maxsize=None)
+def model_shape(model: Type[BaseModel]) -> tuple:
+    """(name, default, default_factory) of each field in declaration order; required fields default to None"""
+    return tuple(
+        (name, None if field.is_required() else field.default, field.default_factory)
+        for name, field in model.model_fields.items()
+    )
+
+def shape_document(shape: tuple, doc: Dict[str, Any], partial: bool = False) -> Dict[str, Any]:
+    """Keep a trusted document's model fields, in order, filling in defaults unless `partial`"""
+    shaped = {}
+    for name, default, default_factory in shape:
+        if name in doc:
+            shaped[name] = doc[name]
+        elif not partial:
+            shaped[name] = default_factory() if default_factory is not None else default
+    return shaped
+
+# ========== SPARSE FIELDSETS ==========
+
+def field_selector(model: Type[BaseModel], exclude: Set[str] = frozenset()):
+    """Build the dependency behind the ?fields= parameter of a model's endpoints.
+
+    The requested names are checked against the model and turned into an inclusion
+    projection, so unrequested fields never leave Mongo. Fields listed in
+    `exclude` can never be selected.
+    """
+    allowed = set(model.model_fields) - set(exclude)
+
+    def select_fields(
+        fields: Optional[str] = Query(None, description="Comma-separated list of fields to return")
+    ) -> Optional[Dict[str, int]]:
+        if not fields:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = sorted(requested - allowed)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        projection = {"_id": 0, "id": 1}
+        projection.update(dict.fromkeys(requested, 1))
+        return projection
+
+    return select_fields
+
+@lru_cache(maxsize=None)
+def partial_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """Same fields as `model`, all optional, for validating projected documents"""
+    fields = {name: (Optional[field.annotation], None) for name, field in model.model_fields.items()}
+    return create_model(f"Partial{model.__name__}", __config__=ConfigDict(extra="ignore"), **fields)
+
+def sparse_response(model: Type[BaseModel], data, projection: Optional[Dict[str, int]], response: Optional[Response] = None,
+                    trusted: Optional[bool] = None):
+    """Render `data` as `model` documents, or as partial documents when a ?fields= projection is active.
+
+    Trusted documents (the default, see TRUSTED_READS) skip validation: they are cut
+    down to the model's fields and serialized directly. Otherwise a cached
+    TypeAdapter validates them and dump_json renders the body, with partial
+    documents validated against partial_model() and only the fields that were set.
+    Either way FastAPI's response_model handling is bypassed, while the route's
+    response_model still defines the OpenAPI schema.
+    """
+    many = isinstance(data, list)
+    if TRUSTED_READS if trusted is None else trusted:
+        shape = model_shape(model)
+        partial = projection is not None
+        content = [shape_document(shape, doc, partial) for doc in data] if many else shape_document(shape, data, partial)
+        body = pydantic_core.to_json(content)
+    elif projection is None:
+        adapter = response_adapter(model, many)
+        body = adapter.dump_json(adapter.validate_python(data))
+    else:
+        adapter = response_adapter(partial_model(model), many)
+        body = adapter.dump_json(adapter.validate_python(data), exclude_unset=True)
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content=body, headers=headers)
+
+# ========== AMOUNT STATISTICS ==========
+
+class Granularity(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+def date_range_filter(field: str, date_from: Optional[date], date_to: Optional[date]) -> Dict[str, Any]:
+    """Inclusive date range on an ISO date or datetime string field"""
+    bounds = {}
+    if date_from:
+        bounds["$gte"] = date_from.isoformat()
+    if date_to:
+        # Exclusive next-day bound so datetimes later on the `to` day still match
+        bounds["$lt"] = (date_to + timedelta(days=1)).isoformat()
+    return {field: bounds} if bounds else {}
+
+async def amount_stats(collection, query: Dict[str, Any], date_field: str, granularity: Optional[Granularity] = None) -> Dict[str, Any]:
+    """Total, count and per-category sums of `amount`, computed inside Mongo.
+
+    With a granularity the same pass also buckets the rows by day, week or month
+    of `date_field` into a time series.
+    """
+    facets = {
+        "totals": [{"$group": {"_id": None, "total": {"$sum": "$amount"}, "count": {"$sum": 1}}}],
+        "by_category": [{"$group": {"_id": {"$ifNull": ["$category", "General"]}, "total": {"$sum": "$amount"}}}],
+    }
+    if granularity:
+        period = {"$dateTrunc": {
+            "date": {"$dateFromString": {"dateString": f"${date_field}", "onError": None, "onNull": None}},
+            "unit": granularity.value,
+        }}
+        facets["series"] = [
+            {"$group": {"_id": period, "total": {"$sum": "$amount"}, "count": {"$sum": 1}}},
+            {"$match": {"_id": {"$ne": None}}},
+            {"$sort": {"_id": 1}},
+        ]
+
+    result = (await collection.aggregate([{"$match": query}, {"$facet": facets}]).to_list(1))[0]
+    totals = result["totals"][0] if result["totals"] else {"total": 0, "count": 0}
+    stats = {
+        "total": totals["total"],
+        "count": totals["count"],
+        "by_category": {row["_id"]: row["total"] for row in result["by_category"]},
+    }
+    if granularity:
+        stats["series"] = [
+            {"period": row["_id"].date().isoformat(), "total": row["total"], "count": row["count"]}
+            for row in result["series"]
+        ]
+    return stats
+
+# ========== CACHING ==========
+
+class TTLCache:
+    """Small in-process cache with per-entry expiry and LRU eviction"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+
+    def get(self, key: Any) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Any, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+# Public read routes kept in the response cache -> collection whose writes invalidate them.
+# Detail routes one segment below (e.g. /api/blogs/{blog_id}) are cached as well.
+CACHED_ROUTES = {
+    "/api/events": "events",
+    "/api/ministries": "ministries",
+    "/api/sermons": "sermons",
+    "/api/testimonials": "testimonials",
+    "/api/countdowns": "countdowns",
+    "/api/foundations": "foundations",
+    "/api/blogs": "blogs",
+    "/api/giving-categories": "giving_categories",
+}
+
+def route_collection(path: str, routes: Dict[str, str]) -> Optional[str]:
+    """Collection behind a list route in `routes` or a detail route one segment below it"""
+    if path in routes:
+        return routes[path]
+    parent, _, leaf = path.rstrip("/").rpartition("/")
+    return routes.get(parent) if leaf else None
+
+class CachedResponse(BaseModel):
+    status: int
+    headers: List[tuple]
+    body: bytes
+    tag: tuple
+    expires_at: float
+
+class ResponseCache:
+    """Serialized public GET responses, keyed by route plus normalized query string.
+
+    Entries are tagged with (collection, brand_id), where brand_id is None for
+    responses that are not filtered by brand. The cache is LRU-bounded by total
+    body size, and writes drop the matching tags through note_write().
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tags: Dict[tuple, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+
+    def generation(self, collection: str) -> int:
+        return self._generations.get(collection, 0)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, tag: tuple, generation: int, status: int, headers: List[tuple], body: bytes) -> None:
+        # A write landed while this response was being built, it may already be stale
+        if generation != self.generation(tag[0]) or len(body) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = CachedResponse(
+            status=status, headers=headers, body=body, tag=tag,
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        self._tags.setdefault(tag, set()).add(key)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, collection: str, brand_id: Optional[str] = None) -> None:
+        self._generations[collection] = self.generation(collection) + 1
+        if brand_id is None:
+            tags = [tag for tag in self._tags if tag[0] == collection]
+        else:
+            tags = [(collection, brand_id), (collection, None)]
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= len(entry.body)
+        keys = self._tags.get(entry.tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[entry.tag]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+response_cache = ResponseCache(
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+    ttl_seconds=float(os.environ.get('RESPONSE_CACHE_TTL', '300'))
+)
+
+class ResponseCacheMiddleware:
+    """Serve anonymous GETs on CACHED_ROUTES from response_cache"""
+
+    def __init__(self, app, cache: ResponseCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        collection = route_collection(scope["path"], CACHED_ROUTES)
+        if collection is None or any(name == b"authorization" for name, _ in scope["headers"]):
+            return await self.app(scope, receive, send)
+
+        params = sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+        key = f"{scope['path']}?{urlencode(params)}"
+        entry = self.cache.get(key)
+        if entry is not None:
+            await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers + [(b"x-cache", b"HIT")]})
+            await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        brand_id = dict(params).get("brand_id") or None
+        generation = self.cache.generation(collection)
+        captured = {"status": None, "headers": None, "body": []}
+
+        async def send_and_capture(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = list(message.get("headers", []))
+                message = {**message, "headers": captured["headers"] + [(b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body":
+                captured["body"].append(message.get("body", b""))
+                if not message.get("more_body", False) and captured["status"] == 200:
+                    self.cache.put(key, (collection, brand_id), generation, 200, captured["headers"], b"".join(captured["body"]))
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
+
+# ========== CONDITIONAL GET ==========
+
+# Cache-Control sent with anonymous API responses, by longest matching path prefix.
+# CACHE_CONTROL_POLICIES (JSON object) in the environment overrides or adds entries.
+CACHE_CONTROL_POLICIES = {
+    "/api": "no-cache",
+    "/api/youtube": "public, max-age=300",
+    "/api/announcements/urgent": "public, max-age=15",
+    **json.loads(os.environ.get('CACHE_CONTROL_POLICIES', '{}')),
+}
+
+def cache_control_policy(path: str) -> Optional[str]:
+    matches = [prefix for prefix in CACHE_CONTROL_POLICIES if path == prefix or path.startswith(prefix + "/")]
+    return CACHE_CONTROL_POLICIES[max(matches, key=len)] if matches else None
+
+def opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+def etag_matches(request_headers: Headers, etag: str) -> bool:
+    """Whether the request's If-None-Match already names `etag`.
+
+    Shared by every 304 path: the middleware, the brand snapshot and the upload store.
+    """
+    header = request_headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x" on either side
+    return "*" in candidates or opaque_tag(etag) in (opaque_tag(tag) for tag in candidates)
+
+class ConditionalGetMiddleware:
+    """ETag and Cache-Control for anonymous GETs under /api.
+
+    The ETag is a hash of the response body unless the handler already set one,
+    and a matching If-None-Match turns the response into a bodiless 304. There is
+    no Last-Modified: writes from other workers and the maintenance scripts are
+    invisible to this process, so a date it made up could answer 304 forever.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith("/api/"):
+            return await self.app(scope, receive, send)
+        # UploadStaticFiles handles its own validators and streams files that mustn't be buffered here
+        if scope["path"].startswith(UPLOADS_URL_PREFIX + "/"):
+            return await self.app(scope, receive, send)
+        request_headers = Headers(scope=scope)
+        if "authorization" in request_headers:
+            return await self.app(scope, receive, send)
+
+        start = {}
+        chunks = []
+
+        async def buffer(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self._respond(scope, request_headers, start, b"".join(chunks), send)
+
+        await self.app(scope, receive, buffer)
+
+    async def _respond(self, scope, request_headers: Headers, start: Dict[str, Any], body: bytes, send) -> None:
+        headers = MutableHeaders(raw=list(start.get("headers", [])))
+        if start["status"] != 200:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        path = scope["path"]
+        etag = headers.get("etag")
+        if etag is None:
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            headers["etag"] = etag
+        policy = cache_control_policy(path)
+        if policy and "cache-control" not in headers:
+            headers["cache-control"] = policy
+
+        if etag_matches(request_headers, etag):
+            kept = [(k, v) for k, v in headers.raw if k in (b"etag", b"cache-control", b"vary")]
+            await send({"type": "http.response.start", "status": 304, "headers": kept})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({**start, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
+
+def note_write(collection: str, brand_id: Optional[str] = None) -> None:
+    """Tell the in-process caches that `collection` changed for `brand_id`.
+
+    Handlers call this after writing brand-scoped content. A brand_id of None
+    means the affected brand is unknown, so every brand is invalidated.
+    """
+    response_cache.invalidate(collection, brand_id)
+    if collection in ANALYTICS_TOTALS.values():
+        if brand_id is None:
+            analytics_cache.clear()
+        else:
+            analytics_cache.pop(brand_id)
+            analytics_cache.pop(None)  # the all-brands overview
+    if collection == "announcements":
+        urgent_announcements.invalidate(brand_id)
+
 # ========== AUTH UTILITIES ==========
 
 def hash_password(password: str) -> str:
@@ -614,6 +1340,97 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded thread pool instead of the event loop.
+
+    bcrypt releases the GIL, so up to max_workers hashes run in parallel while the
+    loop keeps serving other requests. Up to max_queue more wait for a worker;
+    anything beyond that is rejected with a 503 straight away.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Too many sign-in attempts in progress, please retry", headers={"Retry-After": "1"})
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "in_flight": min(self.pending, self.max_workers),
+            "queue_depth": max(self.pending - self.max_workers, 0),
+            "max_queue": self.max_queue,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher(
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1))),
+    max_queue=int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', '64'))
+)
+
+# Authenticated principals by (role, email), so parallel dashboard calls share one lookup
+principal_cache = TTLCache(ttl_seconds=float(os.environ.get('PRINCIPAL_CACHE_TTL', '60')), max_entries=10000)
+_principal_lookups: Dict[tuple, asyncio.Task] = {}
+
+async def _fetch_principal(role: str, email: str) -> Optional[Dict[str, Any]]:
+    key = (role, email)
+    collection = db.admins if role == "admin" else db.users
+    principal = await collection.find_one({"email": email}, {"_id": 0, "password_hash": 0})
+    # Skip caching if forget_principal() ran while this lookup was in flight
+    if principal is not None and _principal_lookups.get(key) is asyncio.current_task():
+        principal_cache.set(key, principal)
+    return principal
+
+async def load_principal(role: str, email: str) -> Optional[Dict[str, Any]]:
+    """Admin or member document for a token subject, served from principal_cache.
+
+    Concurrent misses for the same subject share a single find_one. Unknown
+    subjects are not cached.
+    """
+    key = (role, email)
+    principal = principal_cache.get(key)
+    if principal is not None:
+        return principal
+    lookup = _principal_lookups.get(key)
+    if lookup is None:
+        lookup = asyncio.ensure_future(_fetch_principal(role, email))
+        _principal_lookups[key] = lookup
+        lookup.add_done_callback(lambda done: _principal_lookups.pop(key, None) if _principal_lookups.get(key) is done else None)
+    return await asyncio.shield(lookup)
+
+def forget_principal(role: str, *emails: Optional[str]) -> None:
+    """Drop cached principals after their account was changed or removed"""
+    for email in emails:
+        if email:
+            principal_cache.pop((role, email))
+            _principal_lookups.pop((role, email), None)
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
@@ -628,7 +1445,7 @@ async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(
         role = payload.get("role")
         if email is None or role != "admin":
             raise HTTPException(status_code=401, detail="Invalid token")
-        admin = await db.admins.find_one({"email": email}, {"_id": 0})
+        admin = await load_principal("admin", email)
         if admin is None:
             raise HTTPException(status_code=401, detail="Admin not found")
         return admin
@@ -645,7 +1462,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         role = payload.get("role")
         if email is None or role != "member":
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"email": email}, {"_id": 0})
+        user = await load_principal("member", email)
         if user is None or not user.get("is_active"):
             raise HTTPException(status_code=401, detail="User not found or inactive")
         return user
@@ -662,8 +1479,8 @@ async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials]
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         email = payload.get("email")
         role = payload.get("role")
-        if role == "member":
-            user = await db.users.find_one({"email": email}, {"_id": 0})
+        if role == "member" and email:
+            user = await load_principal("member", email)
             if user and user.get("is_active"):
                 return user
     except:
@@ -681,7 +1498,7 @@ async def register_admin(admin_data: AdminCreate):
     
     admin = Admin(email=admin_data.email)
     doc = admin.model_dump()
-    doc["password_hash"] = hash_password(admin_data.password)
+    doc["password_hash"] = await password_hasher.hash(admin_data.password)
     
     await db.admins.insert_one(doc)
     
@@ -691,7 +1508,7 @@ async def register_admin(admin_data: AdminCreate):
 @api_router.post("/auth/login")
 async def login_admin(login_data: AdminLogin):
     admin = await db.admins.find_one({"email": login_data.email}, {"_id": 0})
-    if not admin or not verify_password(login_data.password, admin["password_hash"]):
+    if not admin or not await password_hasher.verify(login_data.password, admin["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     token = create_access_token({"email": admin["email"], "role": "admin"})
@@ -702,24 +1519,504 @@ async def login_admin(login_data: AdminLogin):
 async def get_me(admin = Depends(get_current_admin)):
     return Admin(**admin)
 
+# ========== IMAGE STORE ==========
+
+UPLOADS_DIR = Path(os.environ.get('UPLOADS_DIR', '/app/uploads'))
+# Under /api because that is the only prefix the ingress forwards to the backend; the
+# frontend uses these paths as image src as-is
+UPLOADS_URL_PREFIX = "/api/uploads"
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 20 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+UPLOAD_ROUTES = {"/api/upload-image"}
+
+# Leading bytes of the image formats we accept, mapped to (content type, extension)
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", ("image/jpeg", "jpg")),
+    (b"\x89PNG\r\n\x1a\n", ("image/png", "png")),
+    (b"GIF87a", ("image/gif", "gif")),
+    (b"GIF89a", ("image/gif", "gif")),
+]
+
+def sniff_image_type(head: bytes) -> Optional[tuple]:
+    """(content type, extension) from the file's magic bytes; the client's filename is not trusted"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    for signature, kind in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return kind
+    return None
+
+class ImageStore:
+    """Content-addressed image files under `root`, keyed by SHA-256.
+
+    Files live at <root>/<first two hex digits>/<sha256>.<ext>, so identical uploads
+    share one file. Each stored image also has a document in the `uploads` collection
+    whose id is the digest; other documents keep only the short URL.
+    """
+
+    def __init__(self, root: Path, url_prefix: str):
+        self.root = root
+        self.url_prefix = url_prefix
+
+    def relative_path(self, digest: str, extension: str) -> str:
+        return f"{digest[:2]}/{digest}.{extension}"
+
+    def url_for(self, digest: str, extension: str) -> str:
+        return f"{self.url_prefix}/{self.relative_path(digest, extension)}"
+
+    def _commit(self, partial: Path, digest: str, extension: str) -> bool:
+        """Move a finished temp file to its content address; False if that content was already stored"""
+        path = self.root / self.relative_path(digest, extension)
+        if path.exists():
+            partial.unlink()
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(partial, path)
+        return True
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], original_filename: Optional[str] = None,
+                         max_bytes: int = MAX_UPLOAD_BYTES) -> Dict[str, Any]:
+        """Store an image arriving in chunks.
+
+        Chunks go to a temp file next to the store (so the final rename stays on one
+        filesystem) with all file I/O in worker threads, and are hashed as they arrive.
+        """
+        staging = self.root / ".partial"
+        await asyncio.to_thread(staging.mkdir, parents=True, exist_ok=True)
+        partial = staging / uuid.uuid4().hex
+        handle = await asyncio.to_thread(open, partial, "wb")
+        sha256 = hashlib.sha256()
+        size = 0
+        kind = None
+        try:
+            try:
+                async for chunk in chunks:
+                    if size == 0:
+                        kind = sniff_image_type(chunk[:16])
+                        if kind is None:
+                            raise HTTPException(status_code=400, detail="Invalid file type. Only JPEG, PNG, GIF and WebP images are allowed.")
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise HTTPException(status_code=413, detail=f"Image exceeds the {max_bytes} byte upload limit")
+                    sha256.update(chunk)
+                    await asyncio.to_thread(handle.write, chunk)
+            finally:
+                await asyncio.to_thread(handle.close)
+            if kind is None:
+                raise HTTPException(status_code=400, detail="Empty upload")
+            content_type, extension = kind
+            digest = sha256.hexdigest()
+            written = await asyncio.to_thread(self._commit, partial, digest, extension)
+        except BaseException:
+            await asyncio.to_thread(partial.unlink, missing_ok=True)
+            raise
+        return await self.record(digest, extension, content_type, size, original_filename, written)
+
+    async def put(self, content: bytes, original_filename: Optional[str] = None) -> Dict[str, Any]:
+        async def single_chunk():
+            yield content
+        return await self.put_stream(single_chunk(), original_filename, max_bytes=len(content))
+
+    async def record(self, digest: str, extension: str, content_type: str, size: int,
+                     original_filename: Optional[str], written: bool) -> Dict[str, Any]:
+        """Upsert the `uploads` document for a stored file"""
+        now = datetime.now(timezone.utc).isoformat()
+        doc = await db.uploads.find_one_and_update(
+            {"id": digest},
+            {
+                "$setOnInsert": {
+                    "id": digest,
+                    "url": self.url_for(digest, extension),
+                    "filename": f"{digest}.{extension}",
+                    "original_filename": original_filename,
+                    "content_type": content_type,
+                    "size": size,
+                    "created_at": now,
+                },
+                "$set": {"last_uploaded_at": now},
+                "$inc": {"upload_count": 1},
+            },
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        doc["deduplicated"] = doc["upload_count"] > 1
+        return doc
+
+image_store = ImageStore(UPLOADS_DIR, UPLOADS_URL_PREFIX)
+
+# ========== IMAGE DERIVATIVES ==========
+
+IMAGE_DERIVATIVE_WIDTHS = sorted({int(width) for width in os.environ.get('IMAGE_DERIVATIVE_WIDTHS', '320,640,1024,1600').split(",")})
+IMAGE_DERIVATIVE_QUALITY = int(os.environ.get('IMAGE_DERIVATIVE_QUALITY', 80))
+IMAGE_DERIVATIVE_WORKERS = int(os.environ.get('IMAGE_DERIVATIVE_WORKERS', 2))
+
+# Collections whose list and detail endpoints carry `srcsets` for the stored images they reference
+SRCSET_COLLECTIONS = ["events", "ministries", "gallery", "foundations", "blogs"]
+
+STORED_IMAGE_URL = re.compile(rf"^{re.escape(UPLOADS_URL_PREFIX)}/[0-9a-f]{{2}}/([0-9a-f]{{64}})\.[a-z]+$")
+
+class ImageDerivatives:
+    """Builds the resized WebP copies of stored images in a process pool.
+
+    Decoding, resizing and encoding are CPU bound, so they run in worker processes
+    and the API only awaits the result. The outcome is recorded on the image's
+    `uploads` document as a `srcset` map from width to URL, original included.
+    """
+
+    def __init__(self, store: ImageStore, widths: List[int], quality: int, max_workers: int):
+        self.store = store
+        self.widths = widths
+        self.quality = quality
+        self.max_workers = max_workers
+        self.completed = 0
+        self.failed = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # Created on first use so importing the module never starts processes. Workers
+        # come from a forkserver rather than a fork of this process, whose Motor,
+        # bcrypt and to_thread threads could leave a forked child deadlocked on a lock
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return self._executor
+
+    def schedule(self, upload: Dict[str, Any]) -> None:
+        """Build derivatives for an `uploads` document in the background"""
+        task = asyncio.create_task(self.build(upload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def build(self, upload: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        digest = upload["id"]
+        extension = upload["filename"].rpartition(".")[2]
+        source = self.store.root / self.store.relative_path(digest, extension)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, render_derivatives, str(source), digest, self.widths, self.quality
+            )
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Image derivatives failed for {digest}: {e}")
+            await db.uploads.update_one({"id": digest}, {"$set": {"derivatives_status": "failed"}})
+            return None
+
+        base_url = upload["url"].rpartition("/")[0]
+        srcset = {width: f"{base_url}/{name}" for width, name in result["files"].items()}
+        srcset[str(result["width"])] = upload["url"]
+        await db.uploads.update_one({"id": digest}, {"$set": {
+            "width": result["width"],
+            "height": result["height"],
+            "srcset": srcset,
+            "derivatives_status": "ready",
+        }})
+        self.completed += 1
+        # Cached list responses were rendered without this image's srcset
+        for collection in SRCSET_COLLECTIONS:
+            note_write(collection)
+        return srcset
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "in_progress": len(self._tasks),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+image_derivatives = ImageDerivatives(image_store, IMAGE_DERIVATIVE_WIDTHS, IMAGE_DERIVATIVE_QUALITY, IMAGE_DERIVATIVE_WORKERS)
+
+# Fields that hold srcsets themselves, whose URLs are not references of the document
+SRCSET_FIELDS = {"_id", "srcsets", "srcset"}
+
+def stored_image_digests(value: Any, found: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Content-store image URLs referenced anywhere in a document, with their digests.
+
+    Nested objects and lists are walked too, e.g. blog content_blocks[].image_url.
+    """
+    if found is None:
+        found = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key not in SRCSET_FIELDS:
+                stored_image_digests(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            stored_image_digests(item, found)
+    elif isinstance(value, str):
+        match = STORED_IMAGE_URL.match(value)
+        if match:
+            found[value] = match.group(1)
+    return found
+
+def attach_nested_srcsets(value: Any, srcsets: Dict[str, Dict[str, str]]) -> None:
+    """Give every object nested in `value` whose image_url has derivatives a `srcset` beside it"""
+    items = value.values() if isinstance(value, dict) else value if isinstance(value, list) else ()
+    for item in items:
+        if isinstance(item, dict):
+            if item.get("image_url") in srcsets:
+                item["srcset"] = srcsets[item["image_url"]]
+            attach_nested_srcsets(item, srcsets)
+        elif isinstance(item, list):
+            attach_nested_srcsets(item, srcsets)
+
+async def attach_srcsets(rows: List[Dict[str, Any]], projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+    """Set each row's `srcsets` to {image URL: {width: URL}} for the stored images it references.
+
+    Nested objects with an image_url, such as blog content blocks, also get that
+    image's widths as their own `srcset`.
+    """
+    if projection is not None and "srcsets" not in projection:
+        return rows
+    references = [stored_image_digests(row) for row in rows]
+    digests = {digest for found in references for digest in found.values()}
+    srcsets = {}
+    if digests:
+        async for upload in db.uploads.find({"id": {"$in": list(digests)}, "srcset": {"$exists": True}}, {"_id": 0, "id": 1, "srcset": 1}):
+            srcsets[upload["id"]] = upload["srcset"]
+    for row, found in zip(rows, references):
+        row["srcsets"] = {url: srcsets[digest] for url, digest in found.items() if digest in srcsets}
+        if row["srcsets"]:
+            attach_nested_srcsets(row, row["srcsets"])
+    return rows
+
+async def read_upload(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_BYTES) -> AsyncIterator[bytes]:
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+class UploadLimitMiddleware:
+    """Cap the request body of uploads at the limit plus multipart framing.
+
+    An over-limit Content-Length is refused before any of the body is read. A body
+    sent without one (chunked) is counted as it arrives, and the request fails with
+    413 as soon as it passes the limit, instead of after Starlette has spooled all
+    of it to disk.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_request_bytes = max_bytes + MULTIPART_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in UPLOAD_ROUTES:
+            return await self.app(scope, receive, send)
+
+        detail = f"Image exceeds the {self.max_bytes} byte upload limit"
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_request_bytes:
+            response = JSONResponse({"detail": detail}, status_code=413, headers={"Connection": "close"})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def receive_within_limit():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_request_bytes:
+                    # Raised inside the form parser; FastAPI passes HTTPException through
+                    raise HTTPException(status_code=413, detail=detail, headers={"Connection": "close"})
+            return message
+
+        await self.app(scope, receive_within_limit, send)
+
+# ========== UPLOAD SERVING ==========
+
+# Upload filenames are content hashes (or uuids for older files), so a URL never changes content
+UPLOAD_CACHE_CONTROL = "public, max-age=31536000, immutable"
+UPLOAD_STREAM_CHUNK_BYTES = 256 * 1024
+
+mimetypes.add_type("image/webp", ".webp")
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_byte_range(header: str, size: int) -> Optional[tuple]:
+    """Inclusive (start, end) of a single `bytes=` range, or None if the header should be ignored.
+
+    Multiple ranges are ignored, so the whole file is sent instead. That is allowed and
+    never needed by browsers fetching images or seeking in media.
+    """
+    unit, _, spec = header.partition("=")
+    first, dash, last = spec.strip().partition("-")
+    if unit.strip().lower() != "bytes" or not dash or "," in spec:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+class FileRangeResponse(Response):
+    """A file, or one byte range of it, sent without passing through Python when possible.
+
+    Servers implementing the ASGI zero-copy extension are handed the open file and
+    sendfile() it themselves; otherwise the bytes are read in a worker thread and
+    streamed in chunks.
+    """
+
+    def __init__(self, path: str, start: int, end: int, status_code: int, headers: Dict[str, str]):
+        super().__init__(status_code=status_code, headers={**headers, "content-length": str(end - start + 1)})
+        self.path = path
+        self.start = start
+        self.end = end
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+        handle = await asyncio.to_thread(open, self.path, "rb")
+        try:
+            remaining = self.end - self.start + 1
+            if "http.response.zerocopy" in scope.get("extensions", {}):
+                await send({"type": "http.response.zerocopy", "file": handle, "offset": self.start, "count": remaining})
+                return
+            await asyncio.to_thread(handle.seek, self.start)
+            more_body = True
+            while more_body:
+                chunk = await asyncio.to_thread(handle.read, min(UPLOAD_STREAM_CHUNK_BYTES, remaining)) if remaining > 0 else b""
+                remaining -= len(chunk)
+                # An empty read means the file shrank under us; end the body rather than hang the client
+                more_body = bool(chunk) and remaining > 0
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        finally:
+            await asyncio.to_thread(handle.close)
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles for /uploads with immutable caching and single byte-range support.
+
+    Dot-prefixed paths (such as the .partial staging directory) are never served.
+    """
+
+    async def get_response(self, path: str, scope) -> Response:
+        if any(part.startswith(".") for part in Path(path).parts):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request = Request(scope)
+        size = stat_result.st_size
+        etag = f'"{Path(full_path).stem}"'
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers = {
+            "cache-control": UPLOAD_CACHE_CONTROL,
+            "etag": etag,
+            "last-modified": last_modified,
+            "accept-ranges": "bytes",
+        }
+        if etag_matches(request.headers, etag):
+            return Response(status_code=304, headers=headers)
+        headers["content-type"] = mimetypes.guess_type(str(full_path))[0] or "application/octet-stream"
+
+        byte_range = None
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header and status_code == 200 and (if_range is None or if_range in (etag, last_modified)):
+            try:
+                byte_range = parse_byte_range(range_header, size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if byte_range is None:
+            return FileRangeResponse(full_path, 0, size - 1, status_code, headers)
+        start, end = byte_range
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+        return FileRangeResponse(full_path, start, end, 206, headers)
+
+# ========== BRAND SNAPSHOT ==========
+
+class BrandSnapshot:
+    """Version-stamped, pre-rendered copy of every brand document.
+
+    The brand endpoints are hit on every page load of both sites while brands
+    only change through create_brand/update_brand, which call refresh(). The
+    snapshot also reloads once it is older than max_age seconds so that writes
+    made by other worker processes show up.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self.version = 0
+        self.loaded_at = 0.0
+        self.all_brands = (b"[]", '""')  # (body, etag)
+        self.by_id: Dict[str, tuple] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _entry(content: Any) -> tuple:
+        body = render_json(content)
+        return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    async def refresh(self) -> None:
+        docs = await db.brands.find({}, {"_id": 0}).to_list(1000)
+        brands = [Brand(**doc).model_dump(mode="json") for doc in docs]
+        self.all_brands = self._entry(brands)
+        self.by_id = {brand["id"]: self._entry(brand) for brand in brands}
+        self.version += 1
+        self.loaded_at = time.monotonic()
+
+    async def current(self) -> "BrandSnapshot":
+        if time.monotonic() - self.loaded_at > self.max_age:
+            async with self._lock:
+                if time.monotonic() - self.loaded_at > self.max_age:
+                    await self.refresh()
+        return self
+
+    def respond(self, request: Request, entry: tuple) -> Response:
+        body, etag = entry
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Brands-Version": str(self.version)}
+        if etag_matches(request.headers, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+brand_snapshot = BrandSnapshot(max_age=float(os.environ.get('BRAND_SNAPSHOT_MAX_AGE', '60')))
+
 # ========== BRAND ROUTES ==========
 
 @api_router.get("/brands", response_model=List[Brand])
-async def get_brands():
-    brands = await db.brands.find({}, {"_id": 0}).to_list(100)
-    return brands
+async def get_brands(request: Request):
+    snapshot = await brand_snapshot.current()
+    return snapshot.respond(request, snapshot.all_brands)
 
 @api_router.get("/brands/{brand_id}", response_model=Brand)
-async def get_brand(brand_id: str):
-    brand = await db.brands.find_one({"id": brand_id}, {"_id": 0})
-    if not brand:
-        raise HTTPException(status_code=404, detail="Brand not found")
-    return brand
+async def get_brand(request: Request, brand_id: str):
+    snapshot = await brand_snapshot.current()
+    if brand_id not in snapshot.by_id:
+        # May have been created by another worker since the last refresh
+        if not await db.brands.find_one({"id": brand_id}, {"_id": 0, "id": 1}):
+            raise HTTPException(status_code=404, detail="Brand not found")
+        await snapshot.refresh()
+    return snapshot.respond(request, snapshot.by_id[brand_id])
 
 @api_router.post("/brands", response_model=Brand)
 async def create_brand(brand_data: BrandCreate, admin = Depends(get_current_admin)):
     brand = Brand(**brand_data.model_dump())
     await db.brands.insert_one(brand.model_dump())
+    await brand_snapshot.refresh()
     return brand
 
 @api_router.put("/brands/{brand_id}", response_model=Brand)
@@ -736,27 +2033,31 @@ async def update_brand(brand_id: str, brand_data: BrandUpdate, admin = Depends(g
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Brand not found")
     brand = await db.brands.find_one({"id": brand_id}, {"_id": 0})
+    await brand_snapshot.refresh()
     return brand
 
 # ========== EVENT ROUTES ==========
 
 @api_router.get("/events", response_model=List[Event])
-async def get_events(brand_id: Optional[str] = None):
+async def get_events(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(Event)), page: PageParams = Depends(page_params)):
     query = {"brand_id": brand_id} if brand_id else {}
-    events = await db.events.find(query, {"_id": 0}).to_list(1000)
-    return events
+    events = await paginate(db.events, query, page, response, projection=projection)
+    await attach_srcsets(events, projection)
+    return sparse_response(Event, events, projection, response)
 
 @api_router.get("/events/{event_id}", response_model=Event)
-async def get_event(event_id: str):
-    event = await db.events.find_one({"id": event_id}, {"_id": 0})
+async def get_event(event_id: str, projection: Optional[Dict[str, int]] = Depends(field_selector(Event))):
+    event = await db.events.find_one({"id": event_id}, projection or {"_id": 0})
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return event
+    await attach_srcsets([event], projection)
+    return sparse_response(Event, event, projection)
 
 @api_router.post("/events", response_model=Event)
 async def create_event(event_data: EventCreate, admin = Depends(get_current_admin)):
     event = Event(**event_data.model_dump())
-    await db.events.insert_one(event.model_dump())
+    await db.events.insert_one(event.model_dump(exclude={"srcsets"}))
+    note_write("events", event.brand_id)
     return event
 
 @api_router.put("/events/{event_id}", response_model=Event)
@@ -768,13 +2069,15 @@ async def update_event(event_id: str, event_data: EventCreate, admin = Depends(g
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Event not found")
     event = await db.events.find_one({"id": event_id}, {"_id": 0})
+    note_write("events", event["brand_id"])
     return event
 
 @api_router.delete("/events/{event_id}")
 async def delete_event(event_id: str, admin = Depends(get_current_admin)):
-    result = await db.events.delete_one({"id": event_id})
-    if result.deleted_count == 0:
+    deleted = await db.events.find_one_and_delete({"id": event_id}, projection={"brand_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Event not found")
+    note_write("events", deleted.get("brand_id"))
     return {"message": "Event deleted"}
 
 # ========== EVENT ATTENDEE ROUTES ==========
@@ -788,31 +2091,34 @@ async def register_for_event(event_id: str, attendee_data: EventAttendeeCreate):
     
     attendee = EventAttendee(**attendee_data.model_dump())
     await db.event_attendees.insert_one(attendee.model_dump())
+    note_write("event_attendees", attendee.brand_id)
     return attendee
 
 @api_router.get("/events/{event_id}/attendees", response_model=List[EventAttendee])
-async def get_event_attendees(event_id: str, admin = Depends(get_current_admin)):
-    attendees = await db.event_attendees.find({"event_id": event_id}, {"_id": 0}).to_list(1000)
-    return attendees
+async def get_event_attendees(response: Response, event_id: str, projection: Optional[Dict[str, int]] = Depends(field_selector(EventAttendee)), page: PageParams = Depends(page_params), admin = Depends(get_current_admin)):
+    attendees = await paginate(db.event_attendees, {"event_id": event_id}, page, response, projection=projection)
+    return sparse_response(EventAttendee, attendees, projection, response)
 
 @api_router.get("/attendees", response_model=List[EventAttendee])
-async def get_all_attendees(brand_id: Optional[str] = None, admin = Depends(get_current_admin)):
+async def get_all_attendees(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(EventAttendee)), page: PageParams = Depends(page_params), admin = Depends(get_current_admin)):
     query = {"brand_id": brand_id} if brand_id else {}
-    attendees = await db.event_attendees.find(query, {"_id": 0}).to_list(1000)
-    return attendees
+    attendees = await paginate(db.event_attendees, query, page, response, projection=projection)
+    return sparse_response(EventAttendee, attendees, projection, response)
 
 # ========== MINISTRY ROUTES ==========
 
 @api_router.get("/ministries", response_model=List[Ministry])
-async def get_ministries(brand_id: Optional[str] = None):
+async def get_ministries(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(Ministry)), page: PageParams = Depends(page_params)):
     query = {"brand_id": brand_id} if brand_id else {}
-    ministries = await db.ministries.find(query, {"_id": 0}).to_list(1000)
-    return ministries
+    ministries = await paginate(db.ministries, query, page, response, projection=projection)
+    await attach_srcsets(ministries, projection)
+    return sparse_response(Ministry, ministries, projection, response)
 
 @api_router.post("/ministries", response_model=Ministry)
 async def create_ministry(ministry_data: MinistryCreate, admin = Depends(get_current_admin)):
     ministry = Ministry(**ministry_data.model_dump())
-    await db.ministries.insert_one(ministry.model_dump())
+    await db.ministries.insert_one(ministry.model_dump(exclude={"srcsets"}))
+    note_write("ministries", ministry.brand_id)
     return ministry
 
 @api_router.put("/ministries/{ministry_id}", response_model=Ministry)
@@ -824,48 +2130,127 @@ async def update_ministry(ministry_id: str, ministry_data: MinistryCreate, admin
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Ministry not found")
     ministry = await db.ministries.find_one({"id": ministry_id}, {"_id": 0})
+    note_write("ministries", ministry["brand_id"])
     return ministry
 
 @api_router.delete("/ministries/{ministry_id}")
 async def delete_ministry(ministry_id: str, admin = Depends(get_current_admin)):
-    result = await db.ministries.delete_one({"id": ministry_id})
-    if result.deleted_count == 0:
+    deleted = await db.ministries.find_one_and_delete({"id": ministry_id}, projection={"brand_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Ministry not found")
+    note_write("ministries", deleted.get("brand_id"))
     return {"message": "Ministry deleted"}
 
+# ========== URGENT ANNOUNCEMENTS ==========
+
+URGENT_ANNOUNCEMENTS_MAX_AGE = float(os.environ.get('URGENT_ANNOUNCEMENTS_MAX_AGE', '60'))
+URGENT_ANNOUNCEMENTS_LIMIT = 50
+
+# scheduled_start/scheduled_end that are missing, null or "" mean "no bound"
+UNSCHEDULED = [None, ""]
+
+def schedule_timestamp(value: str) -> Optional[float]:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def urgent_window_query(brand_id: Optional[str], now: str) -> Dict[str, Any]:
+    """Urgent announcements whose schedule contains `now`, served by the (brand_id, is_urgent, scheduled_start, scheduled_end) index"""
+    query = {"brand_id": brand_id} if brand_id else {}
+    query["is_urgent"] = True
+    query["$and"] = [
+        {"$or": [{"scheduled_start": {"$in": UNSCHEDULED}}, {"scheduled_start": {"$lte": now}}]},
+        {"$or": [{"scheduled_end": {"$in": UNSCHEDULED}}, {"scheduled_end": {"$gte": now}}]},
+    ]
+    return query
+
+class UrgentAnnouncements:
+    """Pre-rendered active urgent announcements per brand, valid until the next schedule boundary.
+
+    The banner endpoint is polled on every page view, but its answer only changes
+    when an announcement is written or when one of them starts or ends. Each
+    brand's set is therefore kept until the earliest upcoming scheduled_start or
+    scheduled_end, at most max_age seconds (for writes made by other workers),
+    or until note_write() invalidates it. brand_id comes straight from the query
+    string, so only the most recently used max_entries brands are kept.
+    """
+
+    def __init__(self, max_age: float, max_entries: int = 256):
+        self.max_age = max_age
+        self._entries = TTLCache(ttl_seconds=max_age, max_entries=max_entries)  # brand_id -> (body, expires_at)
+        # Bumped by every invalidation, so a load that raced a write isn't kept (as in ResponseCache)
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, brand_id: Optional[str] = None) -> None:
+        self._generation += 1
+        if brand_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(brand_id)
+            self._entries.pop(None)
+
+    async def current(self, brand_id: Optional[str]) -> bytes:
+        entry = self._entries.get(brand_id)
+        if entry is None or time.time() >= entry[1]:
+            async with self._lock:
+                entry = self._entries.get(brand_id)
+                if entry is None or time.time() >= entry[1]:
+                    generation = self._generation
+                    entry = await self._load(brand_id)
+                    if generation == self._generation:
+                        self._entries.set(brand_id, entry)
+        return entry[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._entries.stats()
+
+    async def _load(self, brand_id: Optional[str]) -> tuple:
+        loaded_at = time.time()
+        now = datetime.fromtimestamp(loaded_at, timezone.utc).isoformat()
+        upcoming_query = {"brand_id": brand_id} if brand_id else {}
+        upcoming_query.update({"is_urgent": True, "scheduled_start": {"$gt": now}})
+        active, upcoming = await asyncio.gather(
+            db.announcements.find(urgent_window_query(brand_id, now), {"_id": 0})
+                .sort("created_at", DESCENDING).to_list(URGENT_ANNOUNCEMENTS_LIMIT),
+            db.announcements.find_one(upcoming_query, {"_id": 0, "scheduled_start": 1}, sort=[("scheduled_start", ASCENDING)]),
+        )
+
+        boundaries = [doc["scheduled_end"] for doc in active if doc.get("scheduled_end")]
+        if upcoming:
+            boundaries.append(upcoming["scheduled_start"])
+        expires_at = loaded_at + self.max_age
+        for boundary in boundaries:
+            timestamp = schedule_timestamp(boundary)
+            if timestamp is not None:
+                # Never re-query more than once a second, even for odd or past timestamps
+                expires_at = min(expires_at, max(timestamp, loaded_at + 1))
+        return render_json(active), expires_at
+
+urgent_announcements = UrgentAnnouncements(URGENT_ANNOUNCEMENTS_MAX_AGE)
+
 # ========== ANNOUNCEMENT ROUTES ==========
 
 @api_router.get("/announcements", response_model=List[Announcement])
-async def get_announcements(brand_id: Optional[str] = None):
+async def get_announcements(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(Announcement)), page: PageParams = Depends(page_params)):
     query = {"brand_id": brand_id} if brand_id else {}
-    announcements = await db.announcements.find(query, {"_id": 0}).to_list(1000)
-    return announcements
+    announcements = await paginate(db.announcements, query, page, response, projection=projection)
+    return sparse_response(Announcement, announcements, projection, response)
 
 @api_router.get("/announcements/urgent")
 async def get_urgent_announcements(brand_id: Optional[str] = None):
-    now = datetime.now(timezone.utc).isoformat()
-    query = {
-        "is_urgent": True,
-        "brand_id": brand_id
-    } if brand_id else {"is_urgent": True}
-    
-    announcements = await db.announcements.find(query, {"_id": 0}).to_list(10)
-    
-    # Filter by scheduled dates
-    filtered = []
-    for ann in announcements:
-        if ann.get("scheduled_start") and ann["scheduled_start"] > now:
-            continue
-        if ann.get("scheduled_end") and ann["scheduled_end"] < now:
-            continue
-        filtered.append(ann)
-    
-    return filtered
+    body = await urgent_announcements.current(brand_id)
+    return Response(content=body, media_type="application/json")
 
 @api_router.post("/announcements", response_model=Announcement)
 async def create_announcement(announcement_data: AnnouncementCreate, admin = Depends(get_current_admin)):
     announcement = Announcement(**announcement_data.model_dump())
     await db.announcements.insert_one(announcement.model_dump())
+    note_write("announcements", announcement.brand_id)
     return announcement
 
 @api_router.put("/announcements/{announcement_id}", response_model=Announcement)
@@ -884,13 +2269,15 @@ async def update_announcement(announcement_id: str, announcement_data: Announcem
     )
     
     announcement = await db.announcements.find_one({"id": announcement_id}, {"_id": 0})
+    note_write("announcements", announcement["brand_id"])
     return announcement
 
 @api_router.delete("/announcements/{announcement_id}")
 async def delete_announcement(announcement_id: str, admin = Depends(get_current_admin)):
-    result = await db.announcements.delete_one({"id": announcement_id})
-    if result.deleted_count == 0:
+    deleted = await db.announcements.find_one_and_delete({"id": announcement_id}, projection={"brand_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Announcement not found")
+    note_write("announcements", deleted.get("brand_id"))
     return {"message": "Announcement deleted"}
 
 # ========== SUBSCRIBER ROUTES ==========
@@ -899,13 +2286,14 @@ async def delete_announcement(announcement_id: str, admin = Depends(get_current_
 async def create_subscriber(subscriber_data: SubscriberCreate):
     subscriber = Subscriber(**subscriber_data.model_dump())
     await db.subscribers.insert_one(subscriber.model_dump())
+    note_write("subscribers", subscriber.brand_id)
     return subscriber
 
 @api_router.get("/subscribers", response_model=List[Subscriber])
-async def get_subscribers(brand_id: Optional[str] = None, admin = Depends(get_current_admin)):
+async def get_subscribers(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(Subscriber)), page: PageParams = Depends(page_params), admin = Depends(get_current_admin)):
     query = {"brand_id": brand_id} if brand_id else {}
-    subscribers = await db.subscribers.find(query, {"_id": 0}).to_list(1000)
-    return subscribers
+    subscribers = await paginate(db.subscribers, query, page, response, projection=projection)
+    return sparse_response(Subscriber, subscribers, projection, response)
 
 # ========== CONTACT ROUTES ==========
 
@@ -913,33 +2301,35 @@ async def get_subscribers(brand_id: Optional[str] = None, admin = Depends(get_cu
 async def create_contact_message(message_data: ContactMessageCreate):
     message = ContactMessage(**message_data.model_dump())
     await db.contact_messages.insert_one(message.model_dump())
+    note_write("contact_messages", message.brand_id)
     return message
 
 @api_router.get("/contact", response_model=List[ContactMessage])
-async def get_contact_messages(brand_id: Optional[str] = None, admin = Depends(get_current_admin)):
+async def get_contact_messages(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(ContactMessage)), page: PageParams = Depends(page_params), admin = Depends(get_current_admin)):
     query = {"brand_id": brand_id} if brand_id else {}
-    messages = await db.contact_messages.find(query, {"_id": 0}).to_list(1000)
-    return messages
+    messages = await paginate(db.contact_messages, query, page, response, projection=projection)
+    return sparse_response(ContactMessage, messages, projection, response)
 
 # ========== SERMON/MESSAGE ROUTES ==========
 
 @api_router.get("/sermons", response_model=List[SermonMessage])
-async def get_sermons(brand_id: Optional[str] = None):
+async def get_sermons(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(SermonMessage)), page: PageParams = Depends(page_params)):
     query = {"brand_id": brand_id} if brand_id else {}
-    sermons = await db.sermons.find(query, {"_id": 0}).to_list(1000)
-    return sermons
+    sermons = await paginate(db.sermons, query, page, response, projection=projection)
+    return sparse_response(SermonMessage, sermons, projection, response)
 
 @api_router.get("/sermons/{sermon_id}", response_model=SermonMessage)
-async def get_sermon(sermon_id: str):
-    sermon = await db.sermons.find_one({"id": sermon_id}, {"_id": 0})
+async def get_sermon(sermon_id: str, projection: Optional[Dict[str, int]] = Depends(field_selector(SermonMessage))):
+    sermon = await db.sermons.find_one({"id": sermon_id}, projection or {"_id": 0})
     if not sermon:
         raise HTTPException(status_code=404, detail="Sermon not found")
-    return sermon
+    return sparse_response(SermonMessage, sermon, projection)
 
 @api_router.post("/sermons", response_model=SermonMessage)
 async def create_sermon(sermon_data: SermonMessageCreate, admin = Depends(get_current_admin)):
     sermon = SermonMessage(**sermon_data.model_dump())
     await db.sermons.insert_one(sermon.model_dump())
+    note_write("sermons", sermon.brand_id)
     return sermon
 
 @api_router.put("/sermons/{sermon_id}", response_model=SermonMessage)
@@ -951,381 +2341,218 @@ async def update_sermon(sermon_id: str, sermon_data: SermonMessageCreate, admin
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Sermon not found")
     sermon = await db.sermons.find_one({"id": sermon_id}, {"_id": 0})
+    note_write("sermons", sermon["brand_id"])
     return sermon
 
 @api_router.delete("/sermons/{sermon_id}")
 async def delete_sermon(sermon_id: str, admin = Depends(get_current_admin)):
-    result = await db.sermons.delete_one({"id": sermon_id})
-    if result.deleted_count == 0:
+    deleted = await db.sermons.find_one_and_delete({"id": sermon_id}, projection={"brand_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Sermon not found")
+    note_write("sermons", deleted.get("brand_id"))
     return {"message": "Sermon deleted"}
 
 # ========== YOUTUBE INTEGRATION ==========
 
+YOUTUBE_CATALOG_PATH = Path(os.environ.get('YOUTUBE_CATALOG_PATH', ROOT_DIR / 'data' / 'youtube_catalog.json'))
+YOUTUBE_RESPONSE_CACHE_SIZE = 256
+
+class YouTubeCatalog:
+    """Curated sermon videos per channel, loaded once from a versioned JSON file.
+
+    Videos are kept newest first per channel and per (channel, category), so a
+    query is a slice of a prebuilt list. Rendered response bodies are cached per
+    channel and query; the catalog never changes while the process runs.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.version = data["version"]
+        self._videos: Dict[tuple, List[Dict[str, Any]]] = {}
+        self._published: Dict[tuple, List[str]] = {}
+        for channel, videos in data["channels"].items():
+            ordered = sorted(videos, key=lambda video: (video["publishedAt"], video["id"]), reverse=True)
+            self._index((channel, None), ordered)
+            for category in {video["category"] for video in ordered}:
+                self._index((channel, category), [video for video in ordered if video["category"] == category])
+        self._rendered: OrderedDict = OrderedDict()
+
+    def _index(self, key: tuple, videos: List[Dict[str, Any]]) -> None:
+        self._videos[key] = videos
+        # Oldest first, for bisect
+        self._published[key] = [video["publishedAt"] for video in reversed(videos)]
+
+    def query(self, channel: str, category: Optional[str], before: Optional[str], limit: Optional[int]) -> List[Dict[str, Any]]:
+        videos = self._videos.get((channel, category), [])
+        if before is not None:
+            older = bisect.bisect_left(self._published.get((channel, category), []), before)
+            videos = videos[len(videos) - older:]
+        return videos[:limit] if limit is not None else videos
+
+    def render(self, channel: str, category: Optional[str], before: Optional[str], limit: Optional[int]) -> tuple:
+        """(body, etag) for a query, rendered once and then served from memory"""
+        key = (channel, category, before, limit)
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            body = render_json(self.query(channel, category, before, limit))
+            rendered = (body, f'"yt{self.version}-{hashlib.blake2b(body, digest_size=12).hexdigest()}"')
+            self._rendered[key] = rendered
+            if len(self._rendered) > YOUTUBE_RESPONSE_CACHE_SIZE:
+                self._rendered.popitem(last=False)
+        else:
+            self._rendered.move_to_end(key)
+        return rendered
+
+youtube_catalog = YouTubeCatalog(YOUTUBE_CATALOG_PATH)
+
 @api_router.get("/youtube/channel/{channel_handle}")
-async def get_youtube_videos(channel_handle: str):
+async def get_youtube_videos(
+    channel_handle: str,
+    category: Optional[str] = None,
+    before: Optional[datetime] = Query(None, description="Only videos published before this time"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+):
     """
-    Fetch videos from YouTube channels
-    Supports @faithcenter_in and @nehemiahdavid channels
+    Curated sermon videos for the @faithcenter_in and @nehemiahdavid channels, newest first.
+    Page through older videos by passing the last publishedAt as `before`.
     """
-    try:
-        # Convert channel handle to proper format
-        if channel_handle.startswith('@'):
-            channel_handle = channel_handle[1:]
-        
-        # Return channel-specific curated sermon videos
-        # In production, you would use YouTube Data API
-        
-        if channel_handle == "faithcenter_in":
-            videos = [
-                {
-                    "id": "fc1",
-                    "videoId": "j7Cj8FhyPQI",
-                    "title": "Bible Study w/ Ps. Nehemiah David",
-                    "publishedAt": "2025-10-24T19:00:00Z",
-                    "description": "Bible study session led by Pastor Nehemiah David. Deep dive into God's Word with practical application for daily living.",
-                    "category": "Bible Study",
-                    "duration": "55:30",
-                    "views": "3.2K"
-                },
-                {
-                    "id": "fc2",
-                    "videoId": "ToQZD74z6vs",
-                    "title": "Faith Center Live | October 12th, 2025 - The Ten Best Ways Part 6",
-                    "publishedAt": "2025-10-12T10:00:00Z",
-                    "description": "Part 6 of our teaching series on the ten best ways to grow in your faith and relationship with God.",
-                    "category": "Sunday Services",
-                    "duration": "68:45",
-                    "views": "5.8K"
-                },
-                {
-                    "id": "fc3",
-                    "videoId": "x5CvVMJj2Tg",
-                    "title": "Annual Faith Conference 2025 | Day 1",
-                    "publishedAt": "2025-10-02T09:00:00Z",
-                    "description": "Day 1 of our Annual Faith Conference 2025 featuring worship and powerful teachings. A transformative gathering of believers.",
-                    "category": "Special Events",
-                    "duration": "189:18",
-                    "views": "15.3K"
-                },
-                {
-                    "id": "fc4",
-                    "videoId": "SI_X6LX8G3o",
-                    "title": "How to Hear God's Voice - Festival of Miracles",
-                    "publishedAt": "2025-09-26T18:30:00Z",
-                    "description": "Special message on recognizing and hearing God's voice in your life. Part of our Festival of Miracles series.",
-                    "category": "Special Events",
-                    "duration": "62:30",
-                    "views": "9.2K"
-                },
-                {
-                    "id": "fc5",
-                    "videoId": "vJh6kAyEMs0",
-                    "title": "Faith Center Live | September 14th, 2025 - The Ten Best Ways Part 2",
-                    "publishedAt": "2025-09-14T10:00:00Z",
-                    "description": "Part 2 of our teaching series on practical ways to strengthen your walk with Christ.",
-                    "category": "Sunday Services",
-                    "duration": "71:20",
-                    "views": "6.4K"
-                },
-                {
-                    "id": "fc6",
-                    "videoId": "c61bjEJgjXA",
-                    "title": "God's Hand Brings Miracles | Full Sermon",
-                    "publishedAt": "2025-09-07T10:00:00Z",
-                    "description": "Full sermon by Pastor Nehemiah David on the miraculous hand of God working in our lives today.",
-                    "category": "Sunday Services",
-                    "duration": "62:15",
-                    "views": "11.5K"
-                },
-                {
-                    "id": "fc7",
-                    "videoId": "peUhOXXFxwQ",
-                    "title": "ANNUAL FAITH CONFERENCE 2025 Day 2 - Testimonies & Miracles",
-                    "publishedAt": "2025-09-07T14:00:00Z",
-                    "description": "Day 2 of Annual Faith Conference with amazing testimonies of God's miraculous power and transformative work.",
-                    "category": "Special Events",
-                    "duration": "240:00",
-                    "views": "18.7K"
-                },
-                {
-                    "id": "fc8",
-                    "videoId": "FqI3wT57qzk",
-                    "title": "Faith Center Live | August 10th, 2025 - First Sunday with Pastor A.J. Swoboda",
-                    "publishedAt": "2025-08-10T10:00:00Z",
-                    "description": "Historic first Sunday service with Lead Pastor A.J. Swoboda. A new season of faith and growth.",
-                    "category": "Sunday Services",
-                    "duration": "65:40",
-                    "views": "8.9K"
-                },
-                {
-                    "id": "fc9",
-                    "videoId": "4rV2K5S76qc",
-                    "title": "Favour and Grace of God | Full Sermon",
-                    "publishedAt": "2025-04-28T10:00:00Z",
-                    "description": "Full sermon on God's favour and grace. Understanding how to walk in divine favour and experience God's unmerited grace.",
-                    "category": "Sunday Services",
-                    "duration": "58:45",
-                    "views": "7.2K"
-                },
-                {
-                    "id": "fc10",
-                    "videoId": "zWZIZ2Zu1Us",
-                    "title": "Men's Gathering - A Life Unaffected by the World",
-                    "publishedAt": "2025-03-16T14:00:00Z",
-                    "description": "Special men's gathering focusing on living a life rooted in faith, not worldly standards.",
-                    "category": "Special Events",
-                    "duration": "54:30",
-                    "views": "4.6K"
-                },
-                {
-                    "id": "fc11",
-                    "videoId": "aU21rNmbShk",
-                    "title": "Bible Study w/ Ps. Nehemiah David | January 31, 2025",
-                    "publishedAt": "2025-01-31T19:00:00Z",
-                    "description": "Weekly Bible study session with Pastor Nehemiah David. Exploring God's Word together.",
-                    "category": "Bible Study",
-                    "duration": "52:15",
-                    "views": "3.8K"
-                },
-                {
-                    "id": "fc12",
-                    "videoId": "G3jgHbDB4TU",
-                    "title": "Prayer Meeting - Seeking His Presence",
-                    "publishedAt": "2025-01-22T18:30:00Z",
-                    "description": "A powerful prayer meeting focused on seeking God's presence and interceding for our community.",
-                    "category": "Prayer & Worship",
-                    "duration": "45:20",
-                    "views": "2.9K"
-                },
-                {
-                    "id": "fc13",
-                    "videoId": "ZxLpEQ_4tqY",
-                    "title": "Youth Service - Purpose in Christ",
-                    "publishedAt": "2025-01-12T18:00:00Z",
-                    "description": "A powerful message for our youth about discovering their God-given purpose and calling.",
-                    "category": "Youth Services",
-                    "duration": "48:15",
-                    "views": "5.4K"
-                },
-                {
-                    "id": "fc14",
-                    "videoId": "FNVf6cLYR0s",
-                    "title": "Community Outreach - Love in Action",
-                    "publishedAt": "2025-01-08T14:00:00Z",
-                    "description": "Highlights from our community outreach program. Serving our neighbors with the love of Christ.",
-                    "category": "Community",
-                    "duration": "32:45",
-                    "views": "3.1K"
-                },
-                {
-                    "id": "fc15",
-                    "videoId": "UpzRmMVSEmY",
-                    "title": "Real Talk Kim - Full Sermon",
-                    "publishedAt": "2024-11-04T10:00:00Z",
-                    "description": "Guest speaker Real Talk Kim delivers a powerful message of truth and transformation.",
-                    "category": "Special Events",
-                    "duration": "53:00",
-                    "views": "6.7K"
-                }
-            ]
-        elif channel_handle == "nehemiahdavid":
-            videos = [
-                {
-                    "id": "nd1",
-                    "videoId": "oCTvqUvt3Q8",
-                    "title": "Sharpen Your Weapon — Gain Spiritual Ascendancy",
-                    "publishedAt": "2025-11-02T10:00:00Z",
-                    "description": "Full sermon encouraging spiritual readiness and sharpening your spiritual weapons for victory in Christ.",
-                    "category": "Sunday Services",
-                    "duration": "62:15",
-                    "views": "8.9K"
-                },
-                {
-                    "id": "nd2",
-                    "videoId": "lsNNwxUQ7Eo",
-                    "title": "How to Recognise God's Voice",
-                    "publishedAt": "2025-10-19T10:00:00Z",
-                    "description": "Teaching on discerning and recognizing God's voice in your life. Learning to distinguish His voice from others.",
-                    "category": "Bible Study",
-                    "duration": "55:30",
-                    "views": "6.8K"
-                },
-                {
-                    "id": "nd3",
-                    "videoId": "nDx_qJpAtd4",
-                    "title": "Nehemiah Sermon Series | Steps to Rebuild Faith",
-                    "publishedAt": "2025-09-10T10:00:00Z",
-                    "description": "Part of a series on the mission and faith of Nehemiah, focusing on steps to rebuild faith and recognize God's open doors.",
-                    "category": "Sunday Services",
-                    "duration": "58:45",
-                    "views": "7.2K"
-                },
-                {
-                    "id": "nd4",
-                    "videoId": "CwTXjaR2g_U",
-                    "title": "God's Hand Brings Miracles | September 7, 2025 Full Sermon",
-                    "publishedAt": "2025-09-07T10:00:00Z",
-                    "description": "Witness the miraculous power of God's hand. A powerful message on God's supernatural intervention in our lives.",
-                    "category": "Sunday Services",
-                    "duration": "64:30",
-                    "views": "10.5K"
-                },
-                {
-                    "id": "nd5",
-                    "videoId": "X_XUN97FoAE",
-                    "title": "Partake in Jesus - Step into Restoration | August 3, 2025 Full Sermon",
-                    "publishedAt": "2025-08-03T10:00:00Z",
-                    "description": "A powerful message on restoration through Christ. Understanding how to partake in Jesus and experience complete healing.",
-                    "category": "Sunday Services",
-                    "duration": "68:15",
-                    "views": "9.8K"
-                },
-                {
-                    "id": "nd6",
-                    "videoId": "7b7W4WtVDtg",
-                    "title": "I am doing a TERRIBLE THING | August 17, 2025 Full Sermon",
-                    "publishedAt": "2025-08-17T10:00:00Z",
-                    "description": "A convicting message on self-examination and repentance. Turning away from things that hinder our walk with God.",
-                    "category": "Sunday Services",
-                    "duration": "59:40",
-                    "views": "7.9K"
-                },
-                {
-                    "id": "nd7",
-                    "videoId": "mT0VK8c9NU4",
-                    "title": "A Life Unaffected by the World | Full Sermon",
-                    "publishedAt": "2025-03-16T10:00:00Z",
-                    "description": "Living a life that is not influenced by worldly standards but rooted in God's truth and principles.",
-                    "category": "Sunday Services",
-                    "duration": "52:30",
-                    "views": "11.3K"
-                },
-                {
-                    "id": "nd8",
-                    "videoId": "9rHa_2VIhIQ",
-                    "title": "Secure your Territory | March 9, 2025 Full Sermon",
-                    "publishedAt": "2025-03-09T10:00:00Z",
-                    "description": "A message on spiritual warfare and securing what God has given you. Standing firm in faith.",
-                    "category": "Sunday Services",
-                    "duration": "56:20",
-                    "views": "8.7K"
-                },
-                {
-                    "id": "nd9",
-                    "videoId": "7LCYOWo85ZY",
-                    "title": "Building Consistency in Prayer | February 2, 2025",
-                    "publishedAt": "2025-02-02T10:00:00Z",
-                    "description": "Practical teaching on developing a consistent and powerful prayer life that transforms your walk with God.",
-                    "category": "Prayer & Worship",
-                    "duration": "48:20",
-                    "views": "5.6K"
-                },
-                {
-                    "id": "nd10",
-                    "videoId": "aU21rNmbShk",
-                    "title": "Bible Study w/ Ps. Nehemiah David | January 31, 2025",
-                    "publishedAt": "2025-01-31T19:00:00Z",
-                    "description": "Weekly Bible study session with Pastor Nehemiah David. Exploring God's Word together with practical application.",
-                    "category": "Bible Study",
-                    "duration": "52:15",
-                    "views": "4.2K"
-                },
-                {
-                    "id": "nd11",
-                    "videoId": "x1Nc7Tk-bjA",
-                    "title": "Assignment, Ability & Priority | December 22, 2024 Full Sermon",
-                    "publishedAt": "2024-12-22T10:00:00Z",
-                    "description": "Understanding your God-given assignment, walking in your abilities, and setting right priorities in life.",
-                    "category": "Sunday Services",
-                    "duration": "61:45",
-                    "views": "9.4K"
-                },
-                {
-                    "id": "nd12",
-                    "videoId": "1Pu1ZQW_g5Y",
-                    "title": "What does the Grace of God do? | May 7, 2024",
-                    "publishedAt": "2024-05-07T10:00:00Z",
-                    "description": "A deep dive into understanding God's grace and its transformative power in the believer's life.",
-                    "category": "Bible Study",
-                    "duration": "54:30",
-                    "views": "7.8K"
-                },
-                {
-                    "id": "nd13",
-                    "videoId": "oQktWgYzME8",
-                    "title": "365 Bible Verses Everyone Should Know - Nehemiah 1:4",
-                    "publishedAt": "2024-01-04T08:00:00Z",
-                    "description": "Daily devotional series exploring essential Bible verses. Today: Nehemiah 1:4 on prayer and fasting.",
-                    "category": "Bible Study",
-                    "duration": "12:30",
-                    "views": "2.9K"
-                },
-                {
-                    "id": "nd14",
-                    "videoId": "31U2OGhylAs",
-                    "title": "EXCEEDING GREATNESS | Part 1",
-                    "publishedAt": "2024-11-15T10:00:00Z",
-                    "description": "First part of powerful teaching series on the exceeding greatness of God's power available to believers.",
-                    "category": "Ministry Training",
-                    "duration": "47:20",
-                    "views": "6.5K"
-                },
-                {
-                    "id": "nd15",
-                    "videoId": "J03uAKirX_8",
-                    "title": "Sowing into the Spirit - Part 2",
-                    "publishedAt": "2024-10-20T10:00:00Z",
-                    "description": "Continuation of teaching on spiritual sowing and reaping. Understanding the law of sowing and reaping in the Spirit.",
-                    "category": "Bible Study",
-                    "duration": "51:40",
-                    "views": "5.3K"
-                },
-                {
-                    "id": "nd16",
-                    "videoId": "sevnilB-BfA",
-                    "title": "Pentecost Sunday | Faith Center Live Experience",
-                    "publishedAt": "2024-06-09T10:00:00Z",
-                    "description": "Celebrating Pentecost Sunday with powerful worship and a message on the Holy Spirit's power.",
-                    "category": "Special Events",
-                    "duration": "72:15",
-                    "views": "13.2K"
-                },
-                {
-                    "id": "nd17",
-                    "videoId": "lIQl5xkU9jM",
-                    "title": "Double Honor for Shame - Part 1",
-                    "publishedAt": "2024-04-14T10:00:00Z",
-                    "description": "First part of powerful series on God's restoration. Instead of shame, God gives double honor and blessing.",
-                    "category": "Sunday Services",
-                    "duration": "58:50",
-                    "views": "8.1K"
-                }
-            ]
-        else:
-            videos = []
-        
-        return videos
-        
-    except Exception as e:
-        logging.error(f"Error fetching YouTube videos: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching YouTube videos: {str(e)}")
+    channel = channel_handle[1:] if channel_handle.startswith('@') else channel_handle
+    if before is not None:
+        if before.tzinfo is None:
+            before = before.replace(tzinfo=timezone.utc)
+        before = before.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    body, etag = youtube_catalog.render(channel, category, before, limit)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+# ========== SEARCH ==========
+
+SEARCH_MAX_LIMIT = 50
+SEARCH_MAX_OFFSET = 500
+SNIPPET_CHARS = 160
+
+def search_terms(q: str) -> List[str]:
+    """Words of a $text query worth highlighting, without negated words and quoting"""
+    return [word for word in re.findall(r'-?[\w\']+', q) if not word.startswith("-")]
+
+def term_pattern(terms: List[str]) -> "re.Pattern":
+    """Terms as whole words or word prefixes, which covers most of what the text
+    index's stemming matches ("pray" marks "praying")"""
+    return re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\w*", re.IGNORECASE)
+
+def mark_terms(text: str, pattern: "re.Pattern") -> str:
+    """All of `text`, HTML-escaped, with every match of `pattern` wrapped in <mark>"""
+    marked = []
+    position = 0
+    for match in pattern.finditer(text):
+        marked.append(html.escape(text[position:match.start()]))
+        marked.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        position = match.end()
+    marked.append(html.escape(text[position:]))
+    return "".join(marked)
+
+def highlight_text(text: str, terms: List[str]) -> str:
+    """All of `text`, HTML-escaped, every term wrapped in <mark>; for titles, which are never cut"""
+    return mark_terms(text, term_pattern(terms)) if terms else html.escape(text)
+
+def highlight_snippet(text: str, terms: List[str], size: int = SNIPPET_CHARS) -> Optional[str]:
+    """HTML-escaped window of `text` around the first term, every term wrapped in <mark>.
+
+    Returns None when no term occurs.
+    """
+    if not terms:
+        return None
+    pattern = term_pattern(terms)
+    first = pattern.search(text)
+    if first is None:
+        return None
+    start = max(0, first.start() - size // 3)
+    if start:
+        # Begin on a word boundary
+        space = text.find(" ", start, first.start())
+        start = space + 1 if space != -1 else start
+    end = min(len(text), start + size)
+    return ("…" if start else "") + mark_terms(text[start:end], pattern) + ("…" if end < len(text) else "")
+
+def search_hit(source: str, doc: Dict[str, Any], terms: List[str]) -> Dict[str, Any]:
+    snippet = None
+    fields = SEARCH_SOURCES[source]["snippet_fields"]
+    for field in fields:
+        if doc.get(field):
+            snippet = highlight_snippet(doc[field], terms)
+            if snippet:
+                break
+    if snippet is None:
+        fallback = next((doc[field] for field in fields if doc.get(field)), "")
+        snippet = html.escape(fallback[:SNIPPET_CHARS]) + ("…" if len(fallback) > SNIPPET_CHARS else "")
+    return {
+        "type": source,
+        "id": doc["id"],
+        "brand_id": doc.get("brand_id"),
+        "title": highlight_text(doc.get("title", ""), terms),
+        "snippet": snippet,
+        "score": round(doc["score"], 4),
+        "created_at": doc.get("created_at"),
+    }
+
+@api_router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    brand_id: Optional[str] = None,
+    types: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(SEARCH_SOURCES)}"),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+):
+    """Ranked full-text search over sermons (including transcripts), blogs, announcements and events.
 
+    Each source is queried through its text index for its top offset+limit hits,
+    and the results are merged by text score. Titles and snippets are HTML-escaped
+    with matches wrapped in <mark>.
+    """
+    sources = list(SEARCH_SOURCES)
+    if types:
+        sources = [name.strip() for name in types.split(",") if name.strip()]
+        unknown = sorted(set(sources) - set(SEARCH_SOURCES))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(unknown)}")
+
+    wanted = offset + limit + 1
+
+    async def search_source(source: str) -> List[Dict[str, Any]]:
+        query = {"$text": {"$search": q}, **SEARCH_SOURCES[source]["filter"]}
+        if brand_id:
+            query["brand_id"] = brand_id
+        projection = {"_id": 0, "id": 1, "brand_id": 1, "title": 1, "created_at": 1, "score": {"$meta": "textScore"}}
+        projection.update(dict.fromkeys(SEARCH_SOURCES[source]["snippet_fields"], 1))
+        cursor = db[source].find(query, projection).sort([("score", {"$meta": "textScore"})]).limit(wanted)
+        return [(source, doc) async for doc in cursor]
+
+    results = await asyncio.gather(*(search_source(source) for source in sources))
+    ranked = sorted((hit for hits in results for hit in hits), key=lambda hit: hit[1]["score"], reverse=True)
+    terms = search_terms(q)
+    page = [search_hit(source, doc, terms) for source, doc in ranked[offset:offset + limit]]
+    return {
+        "query": q,
+        "hits": page,
+        "next_offset": offset + limit if len(ranked) > offset + limit else None,
+    }
 
 # ========== TESTIMONIAL ROUTES ==========
 
 @api_router.get("/testimonials", response_model=List[Testimonial])
-async def get_testimonials(brand_id: Optional[str] = None, featured: Optional[bool] = None):
+async def get_testimonials(response: Response, brand_id: Optional[str] = None, featured: Optional[bool] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(Testimonial)), page: PageParams = Depends(page_params)):
     query = {"brand_id": brand_id} if brand_id else {}
     if featured is not None:
         query["featured"] = featured
-    testimonials = await db.testimonials.find(query, {"_id": 0}).to_list(1000)
-    return testimonials
+    testimonials = await paginate(db.testimonials, query, page, response, projection=projection)
+    return sparse_response(Testimonial, testimonials, projection, response)
 
 @api_router.post("/testimonials", response_model=Testimonial)
 async def create_testimonial(testimonial_data: TestimonialCreate, admin = Depends(get_current_admin)):
     testimonial = Testimonial(**testimonial_data.model_dump())
     await db.testimonials.insert_one(testimonial.model_dump())
+    note_write("testimonials", testimonial.brand_id)
     return testimonial
 
 @api_router.put("/testimonials/{testimonial_id}", response_model=Testimonial)
@@ -1337,13 +2564,15 @@ async def update_testimonial(testimonial_id: str, testimonial_data: TestimonialC
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Testimonial not found")
     testimonial = await db.testimonials.find_one({"id": testimonial_id}, {"_id": 0})
+    note_write("testimonials", testimonial["brand_id"])
     return testimonial
 
 @api_router.delete("/testimonials/{testimonial_id}")
 async def delete_testimonial(testimonial_id: str, admin = Depends(get_current_admin)):
-    result = await db.testimonials.delete_one({"id": testimonial_id})
-    if result.deleted_count == 0:
+    deleted = await db.testimonials.find_one_and_delete({"id": testimonial_id}, projection={"brand_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Testimonial not found")
+    note_write("testimonials", deleted.get("brand_id"))
     return {"message": "Testimonial deleted"}
 
 # ========== PRAYER REQUEST ROUTES ==========
@@ -1352,29 +2581,32 @@ async def delete_testimonial(testimonial_id: str, admin = Depends(get_current_ad
 async def create_prayer_request(prayer_data: PrayerRequestCreate):
     prayer = PrayerRequest(**prayer_data.model_dump())
     await db.prayer_requests.insert_one(prayer.model_dump())
+    note_write("prayer_requests", prayer.brand_id)
     return prayer
 
 @api_router.get("/prayer-requests", response_model=List[PrayerRequest])
-async def get_prayer_requests(brand_id: Optional[str] = None, admin = Depends(get_current_admin)):
+async def get_prayer_requests(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(PrayerRequest)), page: PageParams = Depends(page_params), admin = Depends(get_current_admin)):
     query = {"brand_id": brand_id} if brand_id else {}
-    prayers = await db.prayer_requests.find(query, {"_id": 0}).to_list(1000)
-    return prayers
+    prayers = await paginate(db.prayer_requests, query, page, response, projection=projection)
+    return sparse_response(PrayerRequest, prayers, projection, response)
 
 @api_router.put("/prayer-requests/{prayer_id}/status")
 async def update_prayer_status(prayer_id: str, status: str, admin = Depends(get_current_admin)):
-    result = await db.prayer_requests.update_one(
+    prayer = await db.prayer_requests.find_one_and_update(
         {"id": prayer_id},
-        {"$set": {"status": status}}
+        {"$set": {"status": status}},
+        projection={"brand_id": 1}
     )
-    if result.matched_count == 0:
+    if prayer is None:
         raise HTTPException(status_code=404, detail="Prayer request not found")
+    note_write("prayer_requests", prayer.get("brand_id"))
     return {"message": "Status updated"}
 
 @api_router.get("/prayer-requests/public")
-async def get_public_prayer_requests(brand_id: Optional[str] = None):
+async def get_public_prayer_requests(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(PrayerRequest, exclude={"email"})), page: PageParams = Depends(short_page_params)):
     query = {"brand_id": brand_id, "is_anonymous": False} if brand_id else {"is_anonymous": False}
-    prayers = await db.prayer_requests.find(query, {"_id": 0, "email": 0}).to_list(100)
-    return prayers
+    prayers = await paginate(db.prayer_requests, query, page, response, projection=projection or {"_id": 0, "email": 0})
+    return sparse_response(PrayerRequest, prayers, projection, response)
 
 # ========== DONATION ROUTES ==========
 
@@ -1382,93 +2614,143 @@ async def get_public_prayer_requests(brand_id: Optional[str] = None):
 async def create_donation(donation_data: DonationCreate, admin = Depends(get_current_admin)):
     donation = Donation(**donation_data.model_dump())
     await db.donations.insert_one(donation.model_dump())
+    note_write("donations", donation.brand_id)
     return donation
 
 @api_router.get("/donations", response_model=List[Donation])
-async def get_donations(brand_id: Optional[str] = None, admin = Depends(get_current_admin)):
+async def get_donations(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(Donation)), page: PageParams = Depends(page_params), admin = Depends(get_current_admin)):
     query = {"brand_id": brand_id} if brand_id else {}
-    donations = await db.donations.find(query, {"_id": 0}).to_list(1000)
-    return donations
+    donations = await paginate(db.donations, query, page, response, projection=projection)
+    return sparse_response(Donation, donations, projection, response)
 
 @api_router.get("/donations/stats")
-async def get_donation_stats(brand_id: Optional[str] = None, admin = Depends(get_current_admin)):
+async def get_donation_stats(
+    brand_id: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: Optional[Granularity] = None,
+    admin = Depends(get_current_admin)
+):
     query = {"brand_id": brand_id} if brand_id else {}
-    donations = await db.donations.find(query, {"_id": 0}).to_list(10000)
+    # Donations are recorded by admins with their own date, filter on that
+    query.update(date_range_filter("date", date_from, date_to))
     
-    total = sum(d["amount"] for d in donations)
-    by_category = {}
-    for d in donations:
-        cat = d.get("category", "General")
-        by_category[cat] = by_category.get(cat, 0) + d["amount"]
-    
-    return {
-        "total": total,
-        "count": len(donations),
-        "by_category": by_category,
-        "donations": donations[-10:]  # Last 10
-    }
+    stats, recent = await asyncio.gather(
+        amount_stats(db.donations, query, "date", granularity),
+        db.donations.find(query, {"_id": 0}).sort([("created_at", DESCENDING), ("id", DESCENDING)]).limit(10).to_list(10)
+    )
+    stats["donations"] = recent  # Last 10
+    return stats
 
 # ========== GALLERY ROUTES ==========
 
 @api_router.get("/gallery", response_model=List[Gallery])
-async def get_gallery_images(brand_id: Optional[str] = None, event_id: Optional[str] = None):
+async def get_gallery_images(response: Response, brand_id: Optional[str] = None, event_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(Gallery)), page: PageParams = Depends(page_params)):
     query = {}
     if brand_id:
         query["brand_id"] = brand_id
     if event_id:
         query["event_id"] = event_id
-    images = await db.gallery.find(query, {"_id": 0}).to_list(1000)
-    return images
+    images = await paginate(db.gallery, query, page, response, projection=projection)
+    await attach_srcsets(images, projection)
+    return sparse_response(Gallery, images, projection, response)
 
 @api_router.post("/gallery", response_model=Gallery)
 async def create_gallery_image(gallery_data: GalleryCreate, admin = Depends(get_current_admin)):
     image = Gallery(**gallery_data.model_dump())
-    await db.gallery.insert_one(image.model_dump())
+    await db.gallery.insert_one(image.model_dump(exclude={"srcsets"}))
+    note_write("gallery", image.brand_id)
     return image
 
 @api_router.delete("/gallery/{image_id}")
 async def delete_gallery_image(image_id: str, admin = Depends(get_current_admin)):
-    result = await db.gallery.delete_one({"id": image_id})
-    if result.deleted_count == 0:
+    deleted = await db.gallery.find_one_and_delete({"id": image_id}, projection={"brand_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Image not found")
+    note_write("gallery", deleted.get("brand_id"))
     return {"message": "Image deleted"}
 
 # ========== ANALYTICS ROUTES ==========
 
+# Name in the overview -> collection it counts
+ANALYTICS_TOTALS = {
+    "events": "events",
+    "ministries": "ministries",
+    "announcements": "announcements",
+    "attendees": "event_attendees",
+    "subscribers": "subscribers",
+    "prayers": "prayer_requests",
+    "testimonials": "testimonials",
+    "sermons": "sermons",
+    "contacts": "contact_messages",
+}
+
+analytics_cache = TTLCache(ttl_seconds=float(os.environ.get('ANALYTICS_CACHE_TTL', '30')), max_entries=256)
+
+async def timed(timings: Dict[str, float], name: str, awaitable):
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+def count_query(collection, query: Dict[str, Any]):
+    # Unfiltered totals come from collection metadata instead of a scan
+    if not query:
+        return collection.estimated_document_count()
+    return collection.count_documents(query)
+
 @api_router.get("/analytics/overview")
 async def get_analytics_overview(brand_id: Optional[str] = None, admin = Depends(get_current_admin)):
+    cached = analytics_cache.get(brand_id)
+    if cached is not None:
+        return {**cached, "cached": True}
+    
     query = {"brand_id": brand_id} if brand_id else {}
+    timings = {}
+    recent_sort = [("created_at", DESCENDING), ("id", DESCENDING)]
     
-    events_count = await db.events.count_documents(query)
-    ministries_count = await db.ministries.count_documents(query)
-    announcements_count = await db.announcements.count_documents(query)
-    attendees_count = await db.attendees.count_documents(query)
-    subscribers_count = await db.subscribers.count_documents(query)
-    prayers_count = await db.prayer_requests.count_documents(query)
-    testimonials_count = await db.testimonials.count_documents(query)
-    sermons_count = await db.sermons.count_documents(query)
-    contacts_count = await db.contact_messages.count_documents(query)
+    # All eleven queries go out at once instead of one round trip after another
+    counts = [
+        timed(timings, name, count_query(db[collection], query))
+        for name, collection in ANALYTICS_TOTALS.items()
+    ]
+    recent = [
+        timed(timings, "recent_attendees", db.event_attendees.find(query, {"_id": 0}).sort(recent_sort).limit(5).to_list(5)),
+        timed(timings, "recent_prayers", db.prayer_requests.find(query, {"_id": 0}).sort(recent_sort).limit(5).to_list(5)),
+    ]
+    start = time.perf_counter()
+    results = await asyncio.gather(*counts, *recent)
+    timings["total"] = round((time.perf_counter() - start) * 1000, 2)
     
-    # Get recent activity
-    recent_attendees = await db.attendees.find(query, {"_id": 0}).sort("created_at", -1).limit(5).to_list(5)
-    recent_prayers = await db.prayer_requests.find(query, {"_id": 0}).sort("created_at", -1).limit(5).to_list(5)
+    totals = dict(zip(ANALYTICS_TOTALS, results[:len(counts)]))
+    recent_attendees, recent_prayers = results[len(counts):]
     
-    return {
-        "totals": {
-            "events": events_count,
-            "ministries": ministries_count,
-            "announcements": announcements_count,
-            "attendees": attendees_count,
-            "subscribers": subscribers_count,
-            "prayers": prayers_count,
-            "testimonials": testimonials_count,
-            "sermons": sermons_count,
-            "contacts": contacts_count
-        },
+    overview = {
+        "totals": totals,
         "recent_activity": {
             "attendees": recent_attendees,
             "prayers": recent_prayers
-        }
+        },
+        "timings": timings
+    }
+    analytics_cache.set(brand_id, overview)
+    return {**overview, "cached": False}
+
+# ========== SYSTEM METRICS ==========
+
+@api_router.get("/system/metrics")
+async def get_system_metrics(admin = Depends(get_current_admin)):
+    return {
+        "password_hashing": password_hasher.stats(),
+        "analytics_cache": analytics_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "image_derivatives": image_derivatives.stats(),
+        "payment_reconciler": payment_reconciler.stats(),
+        "webhook_queue": webhook_queue.stats(),
+        "idempotency_keys": idempotency_keys.stats(),
+        "urgent_announcements": urgent_announcements.stats()
     }
 
 # ========== MEMBER USER ROUTES ==========
@@ -1487,7 +2769,7 @@ async def register_user(user_data: UserCreate):
         brand_id=user_data.brand_id
     )
     doc = user.model_dump()
-    doc["password_hash"] = hash_password(user_data.password)
+    doc["password_hash"] = await password_hasher.hash(user_data.password)
     
     await db.users.insert_one(doc)
     
@@ -1497,7 +2779,7 @@ async def register_user(user_data: UserCreate):
 @api_router.post("/users/login", response_model=UserLoginResponse)
 async def login_user(login_data: UserLogin):
     user = await db.users.find_one({"email": login_data.email}, {"_id": 0})
-    if not user or not verify_password(login_data.password, user["password_hash"]):
+    if not user or not await password_hasher.verify(login_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     if not user.get("is_active"):
@@ -1521,15 +2803,16 @@ async def update_current_user(user_data: UserUpdate, user = Depends(get_current_
             {"id": user["id"]},
             {"$set": update_dict}
         )
+        forget_principal("member", user["email"], update_dict.get("email"))
     
     updated_user = await db.users.find_one({"id": user["id"]}, {"_id": 0})
     return User(**updated_user)
 
 @api_router.get("/users", response_model=List[User])
-async def get_all_users(brand_id: Optional[str] = None, admin = Depends(get_current_admin)):
+async def get_all_users(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(User)), page: PageParams = Depends(page_params), admin = Depends(get_current_admin)):
     query = {"brand_id": brand_id} if brand_id else {}
-    users = await db.users.find(query, {"_id": 0, "password_hash": 0}).to_list(1000)
-    return users
+    users = await paginate(db.users, query, page, response, projection=projection or {"_id": 0, "password_hash": 0})
+    return sparse_response(User, users, projection, response)
 
 @api_router.post("/users", response_model=User)
 async def create_user_by_admin(user_data: UserCreate, admin = Depends(get_current_admin)):
@@ -1545,40 +2828,44 @@ async def create_user_by_admin(user_data: UserCreate, admin = Depends(get_curren
         brand_id=user_data.brand_id
     )
     doc = user.model_dump()
-    doc["password_hash"] = hash_password(user_data.password)
+    doc["password_hash"] = await password_hasher.hash(user_data.password)
     
     await db.users.insert_one(doc)
     return user
 
 @api_router.put("/users/{user_id}/status")
 async def toggle_user_status(user_id: str, is_active: bool, admin = Depends(get_current_admin)):
-    result = await db.users.update_one(
+    user = await db.users.find_one_and_update(
         {"id": user_id},
-        {"$set": {"is_active": is_active, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"is_active": is_active, "updated_at": datetime.now(timezone.utc).isoformat()}},
+        projection={"email": 1}
     )
-    if result.matched_count == 0:
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    forget_principal("member", user.get("email"))
     return {"message": "User status updated"}
 
 @api_router.delete("/users/{user_id}")
 async def delete_user(user_id: str, admin = Depends(get_current_admin)):
-    result = await db.users.delete_one({"id": user_id})
-    if result.deleted_count == 0:
+    user = await db.users.find_one_and_delete({"id": user_id}, projection={"email": 1})
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    forget_principal("member", user.get("email"))
     return {"message": "User deleted"}
 
 # ========== GIVING CATEGORY ROUTES ==========
 
 @api_router.get("/giving-categories", response_model=List[GivingCategory])
-async def get_giving_categories(brand_id: Optional[str] = None):
+async def get_giving_categories(response: Response, brand_id: Optional[str] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(GivingCategory)), page: PageParams = Depends(short_page_params)):
     query = {"brand_id": brand_id, "is_active": True} if brand_id else {"is_active": True}
-    categories = await db.giving_categories.find(query, {"_id": 0}).to_list(100)
-    return categories
+    categories = await paginate(db.giving_categories, query, page, response, projection=projection)
+    return sparse_response(GivingCategory, categories, projection, response)
 
 @api_router.post("/giving-categories", response_model=GivingCategory)
 async def create_giving_category(category_data: GivingCategoryCreate, admin = Depends(get_current_admin)):
     category = GivingCategory(**category_data.model_dump())
     await db.giving_categories.insert_one(category.model_dump())
+    note_write("giving_categories", category.brand_id)
     return category
 
 @api_router.put("/giving-categories/{category_id}", response_model=GivingCategory)
@@ -1590,31 +2877,584 @@ async def update_giving_category(category_id: str, category_data: GivingCategory
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Category not found")
     category = await db.giving_categories.find_one({"id": category_id}, {"_id": 0})
+    note_write("giving_categories", category["brand_id"])
     return category
 
 @api_router.delete("/giving-categories/{category_id}")
 async def delete_giving_category(category_id: str, admin = Depends(get_current_admin)):
-    result = await db.giving_categories.delete_one({"id": category_id})
-    if result.deleted_count == 0:
+    deleted = await db.giving_categories.find_one_and_delete({"id": category_id}, projection={"brand_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Category not found")
+    note_write("giving_categories", deleted.get("brand_id"))
     return {"message": "Category deleted"}
 
+# ========== PAYMENT GATEWAY ==========
+
+STRIPE_WEBHOOK_PATH = "/api/webhook/stripe"
+# Public base URL of the backend for Stripe's webhook; when unset, each checkout
+# session gets the base URL of the request that created it
+STRIPE_WEBHOOK_URL = f"{os.environ['BACKEND_URL'].rstrip('/')}{STRIPE_WEBHOOK_PATH}" if os.environ.get('BACKEND_URL') else None
+STRIPE_CONNECT_TIMEOUT = float(os.environ.get('STRIPE_CONNECT_TIMEOUT', '3'))
+STRIPE_READ_TIMEOUT = float(os.environ.get('STRIPE_READ_TIMEOUT', '15'))
+STRIPE_MAX_RETRIES = int(os.environ.get('STRIPE_MAX_RETRIES', '2'))
+STRIPE_POOL_SIZE = int(os.environ.get('STRIPE_POOL_SIZE', '20'))
+
+class PaymentGateway:
+    """The application's single Stripe checkout client, created at startup.
+
+    The stripe library's default HTTP client is pointed at one pooled requests
+    session, so connections to Stripe stay alive between calls, with explicit
+    connect/read timeouts. Network errors, 409/429 and 5xx responses are retried
+    by the library with exponential backoff, retried POSTs reusing their
+    idempotency key. Every call also has an overall deadline covering the retries,
+    so a stalled Stripe shows up as a 504 instead of a hung request.
+
+    Handlers get it through the get_payment_gateway dependency, so tests can swap in
+    a local stand-in with app.dependency_overrides.
+    """
+
+    def __init__(self, api_key: str, webhook_url: Optional[str], connect_timeout: float, read_timeout: float,
+                 max_retries: int, pool_size: int):
+        self._session = requests.Session()
+        self._session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        stripe.default_http_client = stripe.RequestsClient(timeout=(connect_timeout, read_timeout), session=self._session)
+        stripe.max_network_retries = max_retries
+        # Each attempt plus the library's backoff between attempts (capped at 2s each)
+        self.deadline = (connect_timeout + read_timeout + 2) * (max_retries + 1)
+        self.api_key = api_key
+        self.webhook_url = webhook_url
+        self.checkout = StripeCheckout(api_key=api_key, webhook_url=webhook_url or "")
+
+    async def _call(self, awaitable):
+        try:
+            return await asyncio.wait_for(awaitable, self.deadline)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Payment provider timed out")
+
+    async def create_checkout_session(self, checkout_request: CheckoutSessionRequest, base_url: str) -> CheckoutSessionResponse:
+        """Create a session whose webhook goes to the configured URL, else to `base_url`"""
+        checkout = self.checkout
+        if self.webhook_url is None:
+            # Cheap to build; requests still go through the pooled stripe HTTP client
+            checkout = StripeCheckout(api_key=self.api_key, webhook_url=f"{base_url}{STRIPE_WEBHOOK_PATH}")
+        return await self._call(checkout.create_checkout_session(checkout_request))
+
+    async def get_checkout_status(self, session_id: str) -> CheckoutStatusResponse:
+        return await self._call(self.checkout.get_checkout_status(session_id))
+
+    async def handle_webhook(self, body: bytes, signature: Optional[str]):
+        return await self._call(self.checkout.handle_webhook(body, signature))
+
+    def close(self) -> None:
+        self._session.close()
+
+def get_payment_gateway(request: Request) -> PaymentGateway:
+    return request.app.state.payment_gateway
+
+# ========== PAYMENT RECONCILIATION ==========
+
+# Polls for one session within this many seconds of its last Stripe lookup are answered from Mongo
+PAYMENT_STATUS_MIN_INTERVAL = float(os.environ.get('PAYMENT_STATUS_MIN_INTERVAL', '5'))
+PAYMENT_RECONCILE_INTERVAL = float(os.environ.get('PAYMENT_RECONCILE_INTERVAL', '30'))
+PAYMENT_RECONCILE_BATCH_SIZE = int(os.environ.get('PAYMENT_RECONCILE_BATCH_SIZE', '50'))
+PAYMENT_RECONCILE_CONCURRENCY = 5
+# Stripe expires checkout sessions after 24 hours, so older ones are not swept any more
+PAYMENT_RECONCILE_MAX_AGE = timedelta(hours=48)
+
+# Transaction statuses that can still change: created here, an open Stripe session,
+# or a completed one whose payment has not cleared yet
+PENDING_PAYMENT_STATUSES = ["initiated", "open", "complete"]
+
+def payment_status_update(checkout_status: CheckoutStatusResponse) -> Dict[str, Any]:
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "payment_status": checkout_status.payment_status,
+        "status": "completed" if checkout_status.payment_status == "paid" else checkout_status.status,
+        "updated_at": now,
+        "status_checked_at": now,
+    }
+
+def status_checked_recently(transaction: Dict[str, Any]) -> bool:
+    checked_at = transaction.get("status_checked_at")
+    if not checked_at:
+        return False
+    return datetime.now(timezone.utc) - datetime.fromisoformat(checked_at) < timedelta(seconds=PAYMENT_STATUS_MIN_INTERVAL)
+
+_status_lookups: Dict[str, asyncio.Task] = {}
+
+async def _fetch_payment_status(gateway: PaymentGateway, session_id: str) -> Optional[Dict[str, Any]]:
+    checkout_status = await gateway.get_checkout_status(session_id)
+    transaction = await db.payment_transactions.find_one_and_update(
+        {"session_id": session_id},
+        {"$set": payment_status_update(checkout_status)},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if transaction is not None:
+        note_write("payment_transactions", transaction.get("brand_id"))
+    return transaction
+
+async def refresh_payment_status(gateway: PaymentGateway, session_id: str) -> Optional[Dict[str, Any]]:
+    """Look a session up in Stripe and store the result.
+
+    Concurrent callers for the same session share one in-flight lookup, so a
+    success page polling from several tabs costs a single Stripe call.
+    """
+    lookup = _status_lookups.get(session_id)
+    if lookup is None:
+        lookup = asyncio.ensure_future(_fetch_payment_status(gateway, session_id))
+        _status_lookups[session_id] = lookup
+        lookup.add_done_callback(lambda done: _status_lookups.pop(session_id, None) if _status_lookups.get(session_id) is done else None)
+    return await asyncio.shield(lookup)
+
+class PaymentReconciler:
+    """Background sweep that brings pending payment_transactions up to date with Stripe.
+
+    Every `interval` seconds the oldest pending transactions (up to batch_size) that
+    were not looked up recently are checked, a few at a time, and the results are
+    written back in one bulk_write. Between the sweep and webhooks, the status
+    endpoint can usually answer from Mongo. Set PAYMENT_RECONCILER_ENABLED=false on
+    all but one worker process when running several.
+    """
+
+    def __init__(self, interval: float, batch_size: int, concurrency: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.sweeps = 0
+        self.checked = 0
+        self.updated = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, gateway: PaymentGateway) -> None:
+        self._task = asyncio.create_task(self._run(gateway))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self, gateway: PaymentGateway) -> None:
+        while True:
+            try:
+                await self.sweep(gateway)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Payment reconciliation sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def sweep(self, gateway: PaymentGateway) -> int:
+        now = datetime.now(timezone.utc)
+        pending = await db.payment_transactions.find(
+            {
+                "status": {"$in": PENDING_PAYMENT_STATUSES},
+                "created_at": {"$gte": (now - PAYMENT_RECONCILE_MAX_AGE).isoformat()},
+                "$or": [
+                    {"status_checked_at": {"$exists": False}},
+                    {"status_checked_at": {"$lt": (now - timedelta(seconds=PAYMENT_STATUS_MIN_INTERVAL)).isoformat()}},
+                ],
+            },
+            {"_id": 0, "session_id": 1, "brand_id": 1, "payment_status": 1, "status": 1},
+        ).sort("created_at", ASCENDING).to_list(self.batch_size)
+        self.sweeps += 1
+        if not pending:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(transaction: Dict[str, Any]) -> Optional[UpdateOne]:
+            async with semaphore:
+                try:
+                    checkout_status = await gateway.get_checkout_status(transaction["session_id"])
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning(f"Could not reconcile payment {transaction['session_id']}: {e}")
+                    return None
+            update = payment_status_update(checkout_status)
+            if update["payment_status"] != transaction.get("payment_status") or update["status"] != transaction.get("status"):
+                self.updated += 1
+                note_write("payment_transactions", transaction.get("brand_id"))
+            return UpdateOne({"session_id": transaction["session_id"]}, {"$set": update})
+
+        operations = [op for op in await asyncio.gather(*(check(t) for t in pending)) if op is not None]
+        self.checked += len(operations)
+        if operations:
+            await db.payment_transactions.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval,
+            "sweeps": self.sweeps,
+            "checked": self.checked,
+            "updated": self.updated,
+            "errors": self.errors,
+        }
+
+payment_reconciler = PaymentReconciler(PAYMENT_RECONCILE_INTERVAL, PAYMENT_RECONCILE_BATCH_SIZE, PAYMENT_RECONCILE_CONCURRENCY)
+
+# ========== WEBHOOK QUEUE ==========
+
+WEBHOOK_BATCH_SIZE = int(os.environ.get('WEBHOOK_BATCH_SIZE', '100'))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', '8'))
+WEBHOOK_RETRY_BASE_SECONDS = float(os.environ.get('WEBHOOK_RETRY_BASE_SECONDS', '5'))
+WEBHOOK_POLL_INTERVAL = float(os.environ.get('WEBHOOK_POLL_INTERVAL', '5'))
+# A claimed event not finished within this long is assumed lost with its worker and claimed again
+WEBHOOK_CLAIM_TIMEOUT = timedelta(minutes=5)
+
+class WebhookEventStatus(str, Enum):
+    pending = "pending"
+    processing = "processing"
+    processed = "processed"
+    dead = "dead"
+
+class WebhookQueue:
+    """Verified Stripe events stored in `webhook_events` and applied in the background.
+
+    The webhook endpoint only verifies and inserts the event, so it can acknowledge
+    Stripe straight away. Stripe's event id is the document id, which has a unique
+    index, so redeliveries of the same event are dropped on insert. The worker
+    claims due events in batches, applies them to payment_transactions with one
+    bulk_write, and reschedules failures with exponential backoff until
+    max_attempts, after which the event is parked as dead until an admin replays it.
+    """
+
+    def __init__(self, batch_size: int, max_attempts: int, retry_base: float, poll_interval: float):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.poll_interval = poll_interval
+        self.received = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.failed = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def enqueue(self, event: Any, payload: bytes) -> bool:
+        """Store a verified event; False if it was already stored"""
+        await require_dedup_index("webhook_events")
+        now = datetime.now(timezone.utc)
+        event_id = event.event_id or f"sha256:{hashlib.sha256(payload).hexdigest()}"
+        try:
+            await db.webhook_events.insert_one({
+                "id": event_id,
+                "event_type": event.event_type,
+                "session_id": event.session_id,
+                "payment_status": event.payment_status,
+                "metadata": event.metadata,
+                "payload": payload.decode("utf-8", errors="replace"),
+                "status": WebhookEventStatus.pending.value,
+                "attempts": 0,
+                "last_error": None,
+                "next_attempt_at": now,
+                "created_at": now.isoformat(),
+            })
+        except DuplicateKeyError:
+            self.duplicates += 1
+            return False
+        self.received += 1
+        self._wake.set()
+        return True
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Keep draining while full batches come back
+                while await self.process_batch() == self.batch_size:
+                    pass
+            except Exception as e:
+                logger.error(f"Webhook queue batch failed: {e}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self) -> List[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        due = {"$or": [
+            {"status": WebhookEventStatus.pending.value, "next_attempt_at": {"$lte": now}},
+            {"status": WebhookEventStatus.processing.value, "claimed_at": {"$lt": now - WEBHOOK_CLAIM_TIMEOUT}},
+        ]}
+        claimed = []
+        while len(claimed) < self.batch_size:
+            # One document at a time, so two workers never claim the same event
+            event = await db.webhook_events.find_one_and_update(
+                due,
+                {"$set": {"status": WebhookEventStatus.processing.value, "claimed_at": now}, "$inc": {"attempts": 1}},
+                projection={"_id": 0, "payload": 0},
+                sort=[("next_attempt_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if event is None:
+                break
+            claimed.append(event)
+        return claimed
+
+    @staticmethod
+    def _transaction_update(event: Dict[str, Any]) -> Optional[UpdateOne]:
+        if not event.get("session_id"):
+            return None
+        now = datetime.now(timezone.utc).isoformat()
+        return UpdateOne({"session_id": event["session_id"]}, {"$set": {
+            "payment_status": event["payment_status"],
+            "status": "completed" if event["payment_status"] == "paid" else "failed",
+            "updated_at": now,
+            "status_checked_at": now,
+        }})
+
+    async def process_batch(self) -> int:
+        events = await self._claim()
+        if not events:
+            return 0
+
+        updates = [(event, self._transaction_update(event)) for event in events]
+        operations = [operation for _, operation in updates if operation is not None]
+        errors: Dict[str, str] = {}
+        if operations:
+            try:
+                await db.payment_transactions.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                applied = [event for event, operation in updates if operation is not None]
+                for error in e.details.get("writeErrors", []):
+                    errors[applied[error["index"]]["id"]] = error.get("errmsg", "write error")
+            except Exception as e:
+                errors = {event["id"]: str(e) for event, operation in updates if operation is not None}
+
+        now = datetime.now(timezone.utc)
+        succeeded = [event["id"] for event in events if event["id"] not in errors]
+        if succeeded:
+            await db.webhook_events.update_many(
+                {"id": {"$in": succeeded}},
+                {"$set": {"status": WebhookEventStatus.processed.value, "processed_at": now, "last_error": None}},
+            )
+            for event in events:
+                if event["id"] not in errors and event.get("metadata"):
+                    note_write("payment_transactions", event["metadata"].get("brand_id"))
+        for event in events:
+            if event["id"] in errors:
+                dead = event["attempts"] >= self.max_attempts
+                await db.webhook_events.update_one({"id": event["id"]}, {"$set": {
+                    "status": (WebhookEventStatus.dead if dead else WebhookEventStatus.pending).value,
+                    "last_error": errors[event["id"]],
+                    "next_attempt_at": now + timedelta(seconds=self.retry_base * 2 ** (event["attempts"] - 1)),
+                }})
+        self.processed += len(succeeded)
+        self.failed += len(errors)
+        return len(events)
+
+    async def replay(self, event_id: str) -> bool:
+        """Queue a stored event to be applied again, whatever state it is in"""
+        result = await db.webhook_events.update_one({"id": event_id}, {"$set": {
+            "status": WebhookEventStatus.pending.value,
+            "attempts": 0,
+            "next_attempt_at": datetime.now(timezone.utc),
+        }})
+        if result.matched_count:
+            self._wake.set()
+        return bool(result.matched_count)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+webhook_queue = WebhookQueue(WEBHOOK_BATCH_SIZE, WEBHOOK_MAX_ATTEMPTS, WEBHOOK_RETRY_BASE_SECONDS, WEBHOOK_POLL_INTERVAL)
+
+# ========== IDEMPOTENCY KEYS ==========
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_KEY_TTL = timedelta(hours=float(os.environ.get('IDEMPOTENCY_KEY_TTL_HOURS', '24')))
+# A claim not renewed for this long is assumed lost with its request and can be taken
+# over; the request holding it renews it every third of that for as long as it runs
+IDEMPOTENCY_LOCK_SECONDS = float(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', '60'))
+# How long a duplicate waits on the request holding its key before giving up with 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', '30'))
+IDEMPOTENCY_POLL_SECONDS = 0.1
+
+def idempotency_key(key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER)) -> Optional[str]:
+    if key is not None and not 0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_KEY_HEADER} must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+    return key
+
+def request_fingerprint(*parts: Any) -> str:
+    return hashlib.sha256(render_json(parts)).hexdigest()
+
+class IdempotencyKeys:
+    """Run a POST handler at most once per Idempotency-Key.
+
+    The first request inserts an in-progress claim into `idempotency_keys` (unique
+    on `id`, expired by the TTL index on `expires_at`), runs the handler and stores
+    its JSON body. A retry with the same key gets that body back without the handler
+    running again. A duplicate that arrives while the first is still running waits
+    for it: on an in-process event when both landed on this worker, otherwise by
+    polling the claim. The claim is renewed while the handler runs, so a slow Stripe
+    call can't outlive it and let a retry run the handler a second time; only a
+    claim whose request died stops being renewed and gets taken over. Reusing a key
+    for a different request body is a 422. A handler that raises releases its claim,
+    so the client's retry runs it again.
+    """
+
+    def __init__(self, ttl: timedelta, lock_seconds: float, wait_seconds: float):
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.wait_seconds = wait_seconds
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+        self.conflicts = 0
+        self._running: Dict[str, asyncio.Event] = {}
+
+    async def _claim(self, record_id: str, scope: str, fingerprint: str) -> bool:
+        now = datetime.now(timezone.utc)
+        locked_until = now + timedelta(seconds=self.lock_seconds)
+        try:
+            await db.idempotency_keys.insert_one({
+                "id": record_id,
+                "scope": scope,
+                "fingerprint": fingerprint,
+                "status": "in_progress",
+                "locked_until": locked_until,
+                "created_at": now.isoformat(),
+                "expires_at": now + self.ttl,
+            })
+            return True
+        except DuplicateKeyError:
+            taken_over = await db.idempotency_keys.update_one(
+                {"id": record_id, "status": "in_progress", "fingerprint": fingerprint, "locked_until": {"$lt": now}},
+                {"$set": {"locked_until": locked_until}},
+            )
+            return taken_over.modified_count == 1
+
+    async def _hold(self, record_id: str) -> None:
+        """Keep renewing our claim until cancelled"""
+        while True:
+            await asyncio.sleep(self.lock_seconds / 3)
+            try:
+                await db.idempotency_keys.update_one(
+                    {"id": record_id, "status": "in_progress"},
+                    {"$set": {"locked_until": datetime.now(timezone.utc) + timedelta(seconds=self.lock_seconds)}},
+                )
+            except Exception as e:
+                logger.error(f"Could not renew idempotency claim {record_id}: {e}")
+
+    async def _wait(self, record_id: str, timeout: float) -> None:
+        running = self._running.get(record_id)
+        try:
+            if running is not None:
+                await asyncio.wait_for(running.wait(), timeout)
+            else:
+                await asyncio.sleep(min(IDEMPOTENCY_POLL_SECONDS, timeout))
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, scope: str, key: Optional[str], fingerprint: str, handler):
+        if key is None:
+            return await handler()
+
+        await require_dedup_index("idempotency_keys")
+        record_id = f"{scope}:{key}"
+        deadline = time.monotonic() + self.wait_seconds
+        waited = False
+        while not await self._claim(record_id, scope, fingerprint):
+            record = await db.idempotency_keys.find_one({"id": record_id}, {"_id": 0})
+            if record is None:
+                # Released by a failed request, or expired, since our claim attempt
+                continue
+            if record["fingerprint"] != fingerprint:
+                self.conflicts += 1
+                raise HTTPException(status_code=422, detail=f"{IDEMPOTENCY_KEY_HEADER} was already used for a different request")
+            if record["status"] == "completed":
+                self.replayed += 1
+                return FastJSONResponse(
+                    record["response"].encode(),
+                    status_code=record["status_code"],
+                    headers={IDEMPOTENCY_REPLAYED_HEADER: "true"},
+                )
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.conflicts += 1
+                raise HTTPException(status_code=409, detail=f"A request with this {IDEMPOTENCY_KEY_HEADER} is still in progress")
+            if not waited:
+                waited = True
+                self.waited += 1
+            await self._wait(record_id, remaining)
+
+        running = self._running[record_id] = asyncio.Event()
+        holder = asyncio.create_task(self._hold(record_id))
+        try:
+            result = await handler()
+        except Exception:
+            await db.idempotency_keys.delete_one({"id": record_id, "status": "in_progress"})
+            raise
+        else:
+            await db.idempotency_keys.update_one({"id": record_id}, {"$set": {
+                "status": "completed",
+                "status_code": 200,
+                "response": render_json(result).decode(),
+                "completed_at": datetime.now(timezone.utc).isoformat(),
+            }})
+            self.executed += 1
+            return result
+        finally:
+            holder.cancel()
+            self._running.pop(record_id, None)
+            running.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "waited": self.waited,
+            "conflicts": self.conflicts,
+        }
+
+idempotency_keys = IdempotencyKeys(IDEMPOTENCY_KEY_TTL, IDEMPOTENCY_LOCK_SECONDS, IDEMPOTENCY_WAIT_SECONDS)
+
 # ========== STRIPE PAYMENT ROUTES ==========
 
 @api_router.post("/payments/create-checkout")
 async def create_checkout_session(
     request: Request,
     checkout_data: CreateCheckoutRequest,
-    current_user = Depends(get_optional_user)
+    current_user = Depends(get_optional_user),
+    gateway: PaymentGateway = Depends(get_payment_gateway),
+    key: Optional[str] = Depends(idempotency_key)
 ):
+    fingerprint = request_fingerprint(checkout_data, current_user["id"] if current_user else None)
+    return await idempotency_keys.run(
+        "payments/create-checkout", key, fingerprint,
+        lambda: start_checkout_session(request, checkout_data, current_user, gateway),
+    )
+
+async def start_checkout_session(request: Request, checkout_data: CreateCheckoutRequest, current_user, gateway: PaymentGateway):
     try:
         # Get host URL from request
         host_url = str(request.base_url).rstrip('/')
         
-        # Initialize Stripe checkout
-        webhook_url = f"{host_url}/api/webhook/stripe"
-        stripe_checkout = StripeCheckout(api_key=STRIPE_API_KEY, webhook_url=webhook_url)
-        
         # Build success and cancel URLs
         success_url = f"{host_url}/giving/success?session_id={{CHECKOUT_SESSION_ID}}"
         cancel_url = f"{host_url}/giving"
@@ -1642,7 +3482,7 @@ async def create_checkout_session(
             metadata=metadata
         )
         
-        session = await stripe_checkout.create_checkout_session(checkout_request)
+        session = await gateway.create_checkout_session(checkout_request, host_url)
         
         # Create payment transaction record
         transaction = PaymentTransaction(
@@ -1667,12 +3507,14 @@ async def create_checkout_session(
             "session_id": session.session_id
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating checkout session: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create checkout session: {str(e)}")
 
 @api_router.get("/payments/status/{session_id}")
-async def get_payment_status(session_id: str):
+async def get_payment_status(session_id: str, gateway: PaymentGateway = Depends(get_payment_gateway)):
     try:
         # Get transaction from database
         transaction = await db.payment_transactions.find_one({"session_id": session_id}, {"_id": 0})
@@ -1680,121 +3522,112 @@ async def get_payment_status(session_id: str):
         if not transaction:
             raise HTTPException(status_code=404, detail="Transaction not found")
         
-        # If already completed, return existing status
-        if transaction.get("payment_status") == "paid":
+        # Settled, or checked moments ago by another poll, the reconciler or a webhook
+        if transaction.get("status") not in PENDING_PAYMENT_STATUSES or status_checked_recently(transaction):
             return transaction
         
-        # Check status with Stripe
-        webhook_url = f"{os.environ.get('BACKEND_URL', 'http://localhost:8001')}/api/webhook/stripe"
-        stripe_checkout = StripeCheckout(api_key=STRIPE_API_KEY, webhook_url=webhook_url)
-        
-        checkout_status = await stripe_checkout.get_checkout_status(session_id)
-        
-        # Update transaction in database
-        update_data = {
-            "payment_status": checkout_status.payment_status,
-            "status": "completed" if checkout_status.payment_status == "paid" else checkout_status.status,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }
-        
-        await db.payment_transactions.update_one(
-            {"session_id": session_id},
-            {"$set": update_data}
-        )
-        
-        # Get updated transaction
-        updated_transaction = await db.payment_transactions.find_one({"session_id": session_id}, {"_id": 0})
-        
-        return updated_transaction
+        # Check status with Stripe, sharing the lookup with concurrent polls
+        return await refresh_payment_status(gateway, session_id)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error checking payment status: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to check payment status: {str(e)}")
 
 @api_router.post("/webhook/stripe")
-async def stripe_webhook(request: Request):
+async def stripe_webhook(request: Request, gateway: PaymentGateway = Depends(get_payment_gateway)):
+    """Verify a Stripe event, queue it and acknowledge; webhook_queue applies it"""
+    body = await request.body()
+    signature = request.headers.get("Stripe-Signature")
     try:
-        body = await request.body()
-        signature = request.headers.get("Stripe-Signature")
-        
-        webhook_url = f"{str(request.base_url).rstrip('/')}/api/webhook/stripe"
-        stripe_checkout = StripeCheckout(api_key=STRIPE_API_KEY, webhook_url=webhook_url)
-        
-        webhook_response = await stripe_checkout.handle_webhook(body, signature)
-        
-        # Update transaction based on webhook
-        if webhook_response.session_id:
-            update_data = {
-                "payment_status": webhook_response.payment_status,
-                "status": "completed" if webhook_response.payment_status == "paid" else "failed",
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            await db.payment_transactions.update_one(
-                {"session_id": webhook_response.session_id},
-                {"$set": update_data}
-            )
-        
-        return {"status": "success"}
-        
+        webhook_response = await gateway.handle_webhook(body, signature)
     except Exception as e:
         logger.error(f"Webhook error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+    # A storage failure must not be acknowledged, so Stripe delivers the event again
+    try:
+        queued = await webhook_queue.enqueue(webhook_response, body)
+    except Exception as e:
+        logger.error(f"Could not queue webhook event: {str(e)}")
+        raise HTTPException(status_code=503, detail="Could not store webhook event")
+
+    return {"status": "success", "duplicate": not queued}
+
+@api_router.get("/webhook/events")
+async def get_webhook_events(
+    response: Response,
+    status: Optional[WebhookEventStatus] = None,
+    page: PageParams = Depends(page_params),
+    admin = Depends(get_current_admin)
+):
+    query = {"status": status.value} if status else {}
+    return await paginate(db.webhook_events, query, page, response, projection={"_id": 0, "payload": 0})
+
+@api_router.post("/webhook/events/{event_id}/replay")
+async def replay_webhook_event(event_id: str, admin = Depends(get_current_admin)):
+    if not await webhook_queue.replay(event_id):
+        raise HTTPException(status_code=404, detail="Webhook event not found")
+    return {"message": "Webhook event queued for replay"}
+
 @api_router.get("/payments/history")
 async def get_payment_history(
+    response: Response,
     brand_id: Optional[str] = None,
+    projection: Optional[Dict[str, int]] = Depends(field_selector(PaymentTransaction)),
+    page: PageParams = Depends(short_page_params),
     current_user = Depends(get_current_user)
 ):
     query = {"user_id": current_user["id"]}
     if brand_id:
         query["brand_id"] = brand_id
     
-    transactions = await db.payment_transactions.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return transactions
+    transactions = await paginate(db.payment_transactions, query, page, response, projection=projection)
+    return sparse_response(PaymentTransaction, transactions, projection, response)
 
 @api_router.get("/payments/transactions")
 async def get_all_transactions(
+    response: Response,
     brand_id: Optional[str] = None,
+    projection: Optional[Dict[str, int]] = Depends(field_selector(PaymentTransaction)),
+    page: PageParams = Depends(page_params),
     admin = Depends(get_current_admin)
 ):
     query = {"brand_id": brand_id} if brand_id else {}
-    transactions = await db.payment_transactions.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    return transactions
+    transactions = await paginate(db.payment_transactions, query, page, response, projection=projection)
+    return sparse_response(PaymentTransaction, transactions, projection, response)
 
 @api_router.get("/payments/stats")
 async def get_payment_stats(
     brand_id: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: Optional[Granularity] = None,
     admin = Depends(get_current_admin)
 ):
     query = {"brand_id": brand_id, "payment_status": "paid"} if brand_id else {"payment_status": "paid"}
-    transactions = await db.payment_transactions.find(query, {"_id": 0}).to_list(10000)
-    
-    total = sum(t["amount"] for t in transactions)
-    by_category = {}
-    for t in transactions:
-        cat = t.get("category", "General")
-        by_category[cat] = by_category.get(cat, 0) + t["amount"]
+    query.update(date_range_filter("created_at", date_from, date_to))
     
-    return {
-        "total": total,
-        "count": len(transactions),
-        "by_category": by_category,
-        "recent_transactions": transactions[:10]
-    }
+    stats, recent = await asyncio.gather(
+        amount_stats(db.payment_transactions, query, "created_at", granularity),
+        db.payment_transactions.find(query, {"_id": 0}).sort([("created_at", DESCENDING), ("id", DESCENDING)]).limit(10).to_list(10)
+    )
+    stats["recent_transactions"] = recent
+    return stats
 
 # ========== LIVE STREAM ROUTES ==========
 
 @api_router.get("/live-streams", response_model=List[LiveStream])
-async def get_live_streams(brand_id: Optional[str] = None, is_live: Optional[bool] = None):
+async def get_live_streams(response: Response, brand_id: Optional[str] = None, is_live: Optional[bool] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(LiveStream)), page: PageParams = Depends(short_page_params)):
     query = {}
     if brand_id:
         query["brand_id"] = brand_id
     if is_live is not None:
         query["is_live"] = is_live
     
-    streams = await db.live_streams.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return streams
+    streams = await paginate(db.live_streams, query, page, response, projection=projection)
+    return sparse_response(LiveStream, streams, projection, response)
 
 @api_router.get("/live-streams/active")
 async def get_active_stream(brand_id: Optional[str] = None):
@@ -1811,6 +3644,7 @@ async def get_active_stream(brand_id: Optional[str] = None):
 async def create_live_stream(stream_data: LiveStreamCreate, admin = Depends(get_current_admin)):
     stream = LiveStream(**stream_data.model_dump())
     await db.live_streams.insert_one(stream.model_dump())
+    note_write("live_streams", stream.brand_id)
     return stream
 
 @api_router.put("/live-streams/{stream_id}", response_model=LiveStream)
@@ -1822,47 +3656,135 @@ async def update_live_stream(stream_id: str, stream_data: LiveStreamCreate, admi
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Live stream not found")
     stream = await db.live_streams.find_one({"id": stream_id}, {"_id": 0})
+    note_write("live_streams", stream["brand_id"])
     return stream
 
 @api_router.delete("/live-streams/{stream_id}")
 async def delete_live_stream(stream_id: str, admin = Depends(get_current_admin)):
-    result = await db.live_streams.delete_one({"id": stream_id})
-    if result.deleted_count == 0:
+    deleted = await db.live_streams.find_one_and_delete({"id": stream_id}, projection={"brand_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Live stream not found")
+    note_write("live_streams", deleted.get("brand_id"))
     return {"message": "Live stream deleted"}
 
 
+# ========== FOUNDATION COUNTERS ==========
+
+# Donations add to one of N counter documents per foundation instead of all
+# $inc-ing the foundation itself, so a busy appeal doesn't serialize on one document
+FOUNDATION_COUNTER_SHARDS = int(os.environ.get('FOUNDATION_COUNTER_SHARDS', '16'))
+
+async def add_to_raised_amount(foundation_id: str, amount: float) -> None:
+    shard = random.randrange(FOUNDATION_COUNTER_SHARDS)
+    await db.foundation_counters.update_one(
+        {"id": f"{foundation_id}:{shard}"},
+        {"$inc": {"amount": amount}, "$setOnInsert": {"foundation_id": foundation_id, "shard": shard}},
+        upsert=True,
+    )
+
+async def counted_amounts(foundation_ids: Optional[List[str]] = None) -> Dict[str, float]:
+    """Sum of the counter shards by foundation id"""
+    pipeline = [{"$group": {"_id": "$foundation_id", "amount": {"$sum": "$amount"}}}]
+    if foundation_ids is not None:
+        pipeline.insert(0, {"$match": {"foundation_id": {"$in": foundation_ids}}})
+    return {total["_id"]: total["amount"] async for total in db.foundation_counters.aggregate(pipeline)}
+
+async def attach_raised_amounts(rows: List[Dict[str, Any]], projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+    """Add the counter shards to each foundation's stored raised_amount.
+
+    The stored value is the base the shards count on from: everything raised
+    before the counters existed, or the correction set by reconcile_raised_amounts().
+    """
+    if projection is not None and "raised_amount" not in projection:
+        return rows
+    counted = await counted_amounts([row["id"] for row in rows])
+    for row in rows:
+        row["raised_amount"] = row.get("raised_amount", 0.0) + counted.get(row["id"], 0.0)
+    return rows
+
+async def reconcile_raised_amounts(foundation_id: Optional[str] = None, repair: bool = False) -> List[Dict[str, Any]]:
+    """Compare each foundation's raised_amount with the sum of its completed donations.
+
+    Returns the foundations that disagree. With repair, their stored base is reset
+    so that base plus counter shards equals the donation total again. Donations are
+    summed before the shards are, so a donation landing mid-check is never counted
+    twice. One caught between its insert and its $inc can still show up as drift;
+    running the check again settles it.
+    """
+    query = {"id": foundation_id} if foundation_id else {}
+    match = {"payment_status": "completed"}
+    if foundation_id:
+        match["foundation_id"] = foundation_id
+    donated = {
+        total["_id"]: total["amount"]
+        async for total in db.foundation_donations.aggregate([
+            {"$match": match},
+            {"$group": {"_id": "$foundation_id", "amount": {"$sum": "$amount"}}},
+        ])
+    }
+    counted = await counted_amounts([foundation_id] if foundation_id else None)
+
+    drift = []
+    async for foundation in db.foundations.find(query, {"_id": 0, "id": 1, "title": 1, "brand_id": 1, "raised_amount": 1}):
+        base = foundation.get("raised_amount", 0.0)
+        expected = donated.get(foundation["id"], 0.0)
+        actual = base + counted.get(foundation["id"], 0.0)
+        if round(actual - expected, 2) == 0:
+            continue
+        drift.append({
+            "foundation_id": foundation["id"],
+            "title": foundation.get("title"),
+            "raised_amount": round(actual, 2),
+            "donations_total": round(expected, 2),
+            "difference": round(actual - expected, 2),
+        })
+        if repair:
+            await db.foundations.update_one(
+                {"id": foundation["id"]},
+                {"$set": {"raised_amount": expected - counted.get(foundation["id"], 0.0)}},
+            )
+            note_write("foundations", foundation.get("brand_id"))
+    return drift
+
 # ========== FOUNDATION ROUTES ==========
 
 @api_router.get("/foundations", response_model=List[Foundation])
-async def get_foundations(brand_id: Optional[str] = None, is_active: Optional[bool] = None):
+async def get_foundations(response: Response, brand_id: Optional[str] = None, is_active: Optional[bool] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(Foundation)), page: PageParams = Depends(short_page_params)):
     query = {}
     if brand_id:
         query["brand_id"] = brand_id
     if is_active is not None:
         query["is_active"] = is_active
     
-    foundations = await db.foundations.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return foundations
+    foundations = await paginate(db.foundations, query, page, response, projection=projection)
+    await attach_srcsets(foundations, projection)
+    await attach_raised_amounts(foundations, projection)
+    return sparse_response(Foundation, foundations, projection, response)
 
 @api_router.get("/foundations/{foundation_id}", response_model=Foundation)
-async def get_foundation(foundation_id: str):
-    foundation = await db.foundations.find_one({"id": foundation_id}, {"_id": 0})
+async def get_foundation(foundation_id: str, projection: Optional[Dict[str, int]] = Depends(field_selector(Foundation))):
+    foundation = await db.foundations.find_one({"id": foundation_id}, projection or {"_id": 0})
     if not foundation:
         raise HTTPException(status_code=404, detail="Foundation not found")
-    return foundation
+    await attach_srcsets([foundation], projection)
+    await attach_raised_amounts([foundation], projection)
+    return sparse_response(Foundation, foundation, projection)
 
 @api_router.post("/foundations", response_model=Foundation)
 async def create_foundation(foundation: FoundationCreate, admin = Depends(get_current_admin)):
     foundation_dict = foundation.model_dump()
     foundation_obj = Foundation(**foundation_dict)
-    await db.foundations.insert_one(foundation_obj.model_dump())
+    await db.foundations.insert_one(foundation_obj.model_dump(exclude={"srcsets"}))
+    note_write("foundations", foundation_obj.brand_id)
     return foundation_obj
 
 @api_router.post("/foundations/donate")
-async def donate_to_foundation(donation: FoundationDonationCreate):
+async def donate_to_foundation(donation: FoundationDonationCreate, key: Optional[str] = Depends(idempotency_key)):
+    return await idempotency_keys.run("foundations/donate", key, request_fingerprint(donation), lambda: record_foundation_donation(donation))
+
+async def record_foundation_donation(donation: FoundationDonationCreate):
     # Verify foundation exists
-    foundation = await db.foundations.find_one({"id": donation.foundation_id}, {"_id": 0})
+    foundation = await db.foundations.find_one({"id": donation.foundation_id}, {"_id": 0, "brand_id": 1})
     if not foundation:
         raise HTTPException(status_code=404, detail="Foundation not found")
     
@@ -1871,83 +3793,73 @@ async def donate_to_foundation(donation: FoundationDonationCreate):
     donation_obj = FoundationDonation(**donation_dict, payment_status="completed")
     await db.foundation_donations.insert_one(donation_obj.model_dump())
     
-    # Update foundation raised amount
-    await db.foundations.update_one(
-        {"id": donation.foundation_id},
-        {"$inc": {"raised_amount": donation.amount}}
-    )
+    await add_to_raised_amount(donation.foundation_id, donation.amount)
+    note_write("foundations", foundation["brand_id"])
     
     return donation_obj
 
+@api_router.post("/foundations/raised-amounts/reconcile")
+async def reconcile_foundation_raised_amounts(foundation_id: Optional[str] = None, repair: bool = False, admin = Depends(get_current_admin)):
+    drift = await reconcile_raised_amounts(foundation_id, repair)
+    return {"drift": drift, "repaired": repair and bool(drift)}
+
 @api_router.get("/foundations/{foundation_id}/donations")
-async def get_foundation_donations(foundation_id: str, admin = Depends(get_current_admin)):
-    donations = await db.foundation_donations.find(
-        {"foundation_id": foundation_id}, 
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(1000)
-    return donations
+async def get_foundation_donations(response: Response, foundation_id: str, projection: Optional[Dict[str, int]] = Depends(field_selector(FoundationDonation)), page: PageParams = Depends(page_params), admin = Depends(get_current_admin)):
+    donations = await paginate(db.foundation_donations, {"foundation_id": foundation_id}, page, response, projection=projection)
+    return sparse_response(FoundationDonation, donations, projection, response)
 
 # ========== UPLOAD ENDPOINTS ==========
 
 @api_router.post("/upload-image")
 async def upload_image(file: UploadFile = File(...), admin = Depends(get_current_admin)):
+    """Store an image in the content-addressed store and return its URL.
+
+    Uploading the same bytes twice returns the same URL without writing a second copy.
+    Resized WebP derivatives are built in the background and show up as `srcset`
+    once ready.
     """
-    Upload an image and return a base64 data URL
-    This allows storing images directly in the database without external storage
-    """
-    try:
-        # Read file content
-        contents = await file.read()
-        
-        # Get file extension and mime type
-        file_extension = file.filename.split('.')[-1].lower()
-        mime_types = {
-            'jpg': 'image/jpeg',
-            'jpeg': 'image/jpeg',
-            'png': 'image/png',
-            'gif': 'image/gif',
-            'webp': 'image/webp'
-        }
-        
-        mime_type = mime_types.get(file_extension, 'image/jpeg')
-        
-        # Convert to base64
-        base64_encoded = base64.b64encode(contents).decode('utf-8')
-        data_url = f"data:{mime_type};base64,{base64_encoded}"
-        
-        return {
-            "success": True,
-            "image_url": data_url,
-            "filename": file.filename
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
+    stored = await image_store.put_stream(read_upload(file), file.filename)
+    if stored.get("derivatives_status") != "ready":
+        image_derivatives.schedule(stored)
+    return {
+        "success": True,
+        "image_url": stored["url"],
+        "filename": stored["filename"],
+        "sha256": stored["id"],
+        "size": stored["size"],
+        "content_type": stored["content_type"],
+        "deduplicated": stored["deduplicated"],
+        "srcset": stored.get("srcset"),
+    }
 
 # ========== BLOG ENDPOINTS ==========
 
 @api_router.get("/blogs", response_model=List[Blog])
-async def get_blogs(brand_id: Optional[str] = None, published: Optional[bool] = None):
+async def get_blogs(response: Response, brand_id: Optional[str] = None, published: Optional[bool] = None, projection: Optional[Dict[str, int]] = Depends(field_selector(Blog)), page: PageParams = Depends(short_page_params)):
     query = {}
     if brand_id:
         query["brand_id"] = brand_id
     if published is not None:
         query["published"] = published
     
-    blogs = await db.blogs.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return blogs
+    blogs = await paginate(db.blogs, query, page, response, projection=projection)
+    await attach_srcsets(blogs, projection)
+    return sparse_response(Blog, blogs, projection, response)
 
 @api_router.get("/blogs/{blog_id}", response_model=Blog)
-async def get_blog(blog_id: str):
-    blog = await db.blogs.find_one({"id": blog_id}, {"_id": 0})
+async def get_blog(blog_id: str, projection: Optional[Dict[str, int]] = Depends(field_selector(Blog))):
+    blog = await db.blogs.find_one({"id": blog_id}, projection or {"_id": 0})
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
-    return blog
+    await attach_srcsets([blog], projection)
+    return sparse_response(Blog, blog, projection)
 
 @api_router.post("/blogs", response_model=Blog)
 async def create_blog(blog: BlogCreate, admin = Depends(get_current_admin)):
     blog_dict = blog.model_dump()
     blog_obj = Blog(**blog_dict)
-    await db.blogs.insert_one(blog_obj.model_dump())
+    await db.blogs.insert_one(blog_obj.model_dump(exclude=BLOG_READ_ONLY_FIELDS))
+    note_write("blogs", blog_obj.brand_id)
     return blog_obj
 
 @api_router.put("/blogs/{blog_id}", response_model=Blog)
@@ -1958,7 +3870,7 @@ async def update_blog(blog_id: str, blog_update: BlogUpdate, admin = Depends(get
         raise HTTPException(status_code=404, detail="Blog not found")
     
     # Update fields
-    update_data = {k: v for k, v in blog_update.model_dump().items() if v is not None}
+    update_data = {k: v for k, v in blog_update.model_dump(exclude=BLOG_READ_ONLY_FIELDS).items() if v is not None}
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     
     await db.blogs.update_one(
@@ -1968,19 +3880,21 @@ async def update_blog(blog_id: str, blog_update: BlogUpdate, admin = Depends(get
     
     # Return updated blog
     updated_blog = await db.blogs.find_one({"id": blog_id}, {"_id": 0})
+    note_write("blogs", updated_blog["brand_id"])
     return updated_blog
 
 @api_router.delete("/blogs/{blog_id}")
 async def delete_blog(blog_id: str, admin = Depends(get_current_admin)):
-    result = await db.blogs.delete_one({"id": blog_id})
-    if result.deleted_count == 0:
+    deleted = await db.blogs.find_one_and_delete({"id": blog_id}, projection={"brand_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Blog not found")
+    note_write("blogs", deleted.get("brand_id"))
     return {"message": "Blog deleted successfully"}
 
 # ========== COUNTDOWN ENDPOINTS ==========
 
 @api_router.get("/countdowns", response_model=List[Countdown])
-async def get_countdowns(brand_id: Optional[str] = None, active_only: bool = False):
+async def get_countdowns(response: Response, brand_id: Optional[str] = None, active_only: bool = False, projection: Optional[Dict[str, int]] = Depends(field_selector(Countdown)), page: PageParams = Depends(short_page_params)):
     """Get all countdowns, optionally filtered by brand and active status"""
     query = {}
     if brand_id:
@@ -1988,16 +3902,16 @@ async def get_countdowns(brand_id: Optional[str] = None, active_only: bool = Fal
     if active_only:
         query["is_active"] = True
     
-    countdowns = await db.countdowns.find(query, {"_id": 0}).sort("priority", -1).to_list(100)
-    return countdowns
+    countdowns = await paginate(db.countdowns, query, page, response, sort_field="priority", projection=projection)
+    return sparse_response(Countdown, countdowns, projection, response)
 
 @api_router.get("/countdowns/{countdown_id}", response_model=Countdown)
-async def get_countdown(countdown_id: str):
+async def get_countdown(countdown_id: str, projection: Optional[Dict[str, int]] = Depends(field_selector(Countdown))):
     """Get a single countdown by ID"""
-    countdown = await db.countdowns.find_one({"id": countdown_id}, {"_id": 0})
+    countdown = await db.countdowns.find_one({"id": countdown_id}, projection or {"_id": 0})
     if not countdown:
         raise HTTPException(status_code=404, detail="Countdown not found")
-    return countdown
+    return sparse_response(Countdown, countdown, projection)
 
 @api_router.post("/countdowns", response_model=Countdown)
 async def create_countdown(countdown: CountdownCreate, admin = Depends(get_current_admin)):
@@ -2005,6 +3919,7 @@ async def create_countdown(countdown: CountdownCreate, admin = Depends(get_curre
     countdown_dict = countdown.model_dump()
     countdown_obj = Countdown(**countdown_dict)
     await db.countdowns.insert_one(countdown_obj.model_dump())
+    note_write("countdowns", countdown_obj.brand_id)
     return countdown_obj
 
 @api_router.put("/countdowns/{countdown_id}", response_model=Countdown)
@@ -2023,62 +3938,28 @@ async def update_countdown(countdown_id: str, countdown_update: CountdownUpdate,
     )
     
     updated_countdown = await db.countdowns.find_one({"id": countdown_id}, {"_id": 0})
+    note_write("countdowns", updated_countdown["brand_id"])
     return updated_countdown
 
 @api_router.delete("/countdowns/{countdown_id}")
 async def delete_countdown(countdown_id: str, admin = Depends(get_current_admin)):
     """Delete a countdown"""
-    result = await db.countdowns.delete_one({"id": countdown_id})
-    if result.deleted_count == 0:
+    deleted = await db.countdowns.find_one_and_delete({"id": countdown_id}, projection={"brand_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Countdown not found")
+    note_write("countdowns", deleted.get("brand_id"))
     return {"message": "Countdown deleted successfully"}
 
-# ========== IMAGE UPLOAD ROUTE ==========
-
-@api_router.post("/upload-image")
-async def upload_image(file: UploadFile = File(...), admin = Depends(get_current_admin)):
-    """Upload an image file and return the URL"""
-    try:
-        # Validate file type
-        allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"]
-        if file.content_type not in allowed_types:
-            raise HTTPException(status_code=400, detail="Invalid file type. Only images are allowed.")
-        
-        # Create uploads directory if it doesn't exist
-        uploads_dir = Path("/app/uploads")
-        uploads_dir.mkdir(exist_ok=True)
-        
-        # Generate unique filename
-        file_extension = file.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = uploads_dir / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Return URL (in production this would be the CDN URL)
-        # For now, we'll return a path that the frontend can use
-        image_url = f"/uploads/{unique_filename}"
-        
-        return {
-            "success": True,
-            "image_url": image_url,
-            "filename": unique_filename
-        }
-    except Exception as e:
-        logging.error(f"Error uploading image: {e}")
-        raise HTTPException(status_code=500, detail=f"Error uploading image: {str(e)}")
-
 # Include router
 app.include_router(api_router)
 
 # Serve uploaded images
-from fastapi.staticfiles import StaticFiles
-uploads_dir = Path("/app/uploads")
-uploads_dir.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
+UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+app.mount(UPLOADS_URL_PREFIX, UploadStaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
+
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+app.add_middleware(ConditionalGetMiddleware)
+app.add_middleware(UploadLimitMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -2095,6 +3976,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def bootstrap_indexes():
+    if os.environ.get('ENSURE_INDEXES_ON_STARTUP', 'true').lower() == 'true':
+        drift = await ensure_indexes(db)
+        for collection, report in drift.items():
+            logger.warning(f"Index drift on {collection}: {report}")
+    # Drift is only logged, but these are checked again on every request that needs them
+    for collection in DEDUP_INDEXES:
+        try:
+            await require_dedup_index(collection)
+        except HTTPException:
+            pass
+
+@app.on_event("startup")
+async def create_payment_gateway():
+    app.state.payment_gateway = PaymentGateway(
+        STRIPE_API_KEY, STRIPE_WEBHOOK_URL, STRIPE_CONNECT_TIMEOUT, STRIPE_READ_TIMEOUT, STRIPE_MAX_RETRIES, STRIPE_POOL_SIZE
+    )
+    if os.environ.get('PAYMENT_RECONCILER_ENABLED', 'true').lower() == 'true':
+        payment_reconciler.start(app.state.payment_gateway)
+    webhook_queue.start()
+
+@app.on_event("startup")
+async def load_brand_snapshot():
+    await brand_snapshot.refresh()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await payment_reconciler.stop()
+    await webhook_queue.stop()
     client.close()
+    password_hasher.shutdown()
+    image_derivatives.shutdown()
+    app.state.payment_gateway.close()
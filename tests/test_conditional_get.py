@@ -0,0 +1,23 @@
+"""
+etag_matches: the one If-None-Match check behind every 304 the API sends.
+"""
+import pytest
+from starlette.datastructures import Headers
+
+from server import etag_matches
+
+
+@pytest.mark.parametrize("if_none_match, etag, expected", [
+    (None, '"a"', False),
+    ('"a"', '"a"', True),
+    ('"b"', '"a"', False),
+    ('"b", "a"', '"a"', True),
+    ('W/"a"', '"a"', True),
+    ('"a"', 'W/"a"', True),
+    ('W/"a"', 'W/"a"', True),
+    ("*", '"a"', True),
+    ('"b", *', '"a"', True),
+])
+def test_if_none_match_uses_weak_comparison(if_none_match, etag, expected):
+    headers = Headers({"if-none-match": if_none_match} if if_none_match else {})
+    assert etag_matches(headers, etag) is expected
@@ -0,0 +1,219 @@
+"""
+IdempotencyKeys: replay, key reuse, release after failure, claim takeover and renewal,
+and refusal when the unique index on `id` is missing.
+
+The claims live in an in-memory stand-in for the `idempotency_keys` collection,
+so these run without MongoDB.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+import server
+from server import IDEMPOTENCY_REPLAYED_HEADER, IdempotencyKeys, request_fingerprint
+
+
+def matches(document, query):
+    for field, condition in query.items():
+        value = document.get(field)
+        if isinstance(condition, dict):
+            if "$lt" in condition and not (value is not None and value < condition["$lt"]):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class IdempotencyCollection:
+    """The few Motor collection calls IdempotencyKeys makes, backed by a dict keyed on `id`"""
+
+    def __init__(self, unique_id=True):
+        self.documents = {}
+        self.unique_id = unique_id
+
+    async def index_information(self):
+        indexes = {"_id_": {"key": [("_id", 1)]}}
+        if self.unique_id:
+            indexes["id_1"] = {"key": [("id", 1)], "unique": True}
+        return indexes
+
+    async def insert_one(self, document):
+        if document["id"] in self.documents:
+            raise DuplicateKeyError("E11000 duplicate key error")
+        self.documents[document["id"]] = dict(document)
+
+    async def find_one(self, query, projection=None):
+        found = next((doc for doc in self.documents.values() if matches(doc, query)), None)
+        return dict(found) if found else None
+
+    async def update_one(self, query, update):
+        found = next((doc for doc in self.documents.values() if matches(doc, query)), None)
+        if found:
+            found.update(update["$set"])
+        return SimpleNamespace(matched_count=int(bool(found)), modified_count=int(bool(found)))
+
+    async def delete_one(self, query):
+        found = next((doc for doc in self.documents.values() if matches(doc, query)), None)
+        if found:
+            del self.documents[found["id"]]
+
+
+@pytest.fixture
+def claims(monkeypatch):
+    collection = IdempotencyCollection()
+    monkeypatch.setattr(server, "db", SimpleNamespace(idempotency_keys=collection))
+    monkeypatch.setattr(server, "verified_dedup_indexes", set())
+    return collection
+
+
+def keys(lock_seconds=60, wait_seconds=5):
+    return IdempotencyKeys(timedelta(hours=1), lock_seconds, wait_seconds)
+
+
+def counting_handler(calls, result=None, delay=0):
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result or {"session_id": f"cs_{len(calls)}"}
+    return handler
+
+
+def test_without_a_key_the_handler_always_runs(claims):
+    calls = []
+    store = keys()
+
+    async def scenario():
+        await store.run("checkout", None, "f", counting_handler(calls))
+        await store.run("checkout", None, "f", counting_handler(calls))
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert claims.documents == {}
+
+
+def test_retry_replays_the_stored_response(claims):
+    calls = []
+    store = keys()
+
+    async def scenario():
+        first = await store.run("checkout", "k1", "f", counting_handler(calls))
+        replay = await store.run("checkout", "k1", "f", counting_handler(calls))
+        return first, replay
+
+    first, replay = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert first == {"session_id": "cs_1"}
+    assert json.loads(replay.body) == first
+    assert replay.headers[IDEMPOTENCY_REPLAYED_HEADER] == "true"
+    assert store.stats()["replayed"] == 1
+
+
+def test_keys_are_scoped_by_endpoint(claims):
+    calls = []
+    store = keys()
+
+    async def scenario():
+        await store.run("checkout", "k1", "f", counting_handler(calls))
+        await store.run("donate", "k1", "f", counting_handler(calls))
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_reusing_a_key_for_a_different_body_is_rejected(claims):
+    calls = []
+    store = keys()
+
+    async def scenario():
+        await store.run("checkout", "k1", request_fingerprint({"amount": 10}), counting_handler(calls))
+        await store.run("checkout", "k1", request_fingerprint({"amount": 11}), counting_handler(calls))
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(scenario())
+    assert raised.value.status_code == 422
+    assert len(calls) == 1
+
+
+def test_a_failed_handler_releases_its_claim(claims):
+    calls = []
+    store = keys()
+
+    async def failing():
+        calls.append(1)
+        raise HTTPException(status_code=502, detail="Stripe unavailable")
+
+    async def scenario():
+        with pytest.raises(HTTPException):
+            await store.run("checkout", "k1", "f", failing)
+        assert claims.documents == {}
+        return await store.run("checkout", "k1", "f", counting_handler(calls))
+
+    assert asyncio.run(scenario()) == {"session_id": "cs_2"}
+    assert len(calls) == 2
+
+
+def test_concurrent_duplicates_wait_for_the_first_request(claims):
+    calls = []
+    store = keys()
+
+    async def scenario():
+        return await asyncio.gather(*(
+            store.run("checkout", "k1", "f", counting_handler(calls, delay=0.05)) for _ in range(5)
+        ))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert results[0] == {"session_id": "cs_1"}
+    assert all(json.loads(replay.body) == results[0] for replay in results[1:])
+
+
+def test_an_expired_claim_is_taken_over(claims):
+    calls = []
+    store = keys()
+    claims.documents["checkout:k1"] = {
+        "id": "checkout:k1",
+        "fingerprint": "f",
+        "status": "in_progress",
+        "locked_until": datetime.now(timezone.utc) - timedelta(seconds=1),
+    }
+
+    result = asyncio.run(store.run("checkout", "k1", "f", counting_handler(calls)))
+    assert result == {"session_id": "cs_1"}
+    assert claims.documents["checkout:k1"]["status"] == "completed"
+
+
+def test_a_slow_handler_keeps_its_claim_past_the_lock_timeout(claims):
+    calls = []
+    # The handler runs for several lock periods; renewal must keep the duplicate waiting
+    store = keys(lock_seconds=0.06, wait_seconds=2)
+    second_store = keys(lock_seconds=0.06, wait_seconds=2)
+
+    async def scenario():
+        first = asyncio.ensure_future(store.run("checkout", "k1", "f", counting_handler(calls, delay=0.3)))
+        await asyncio.sleep(0.01)
+        # A retry landing on another worker, which only sees the claim in Mongo
+        duplicate = await second_store.run("checkout", "k1", "f", counting_handler(calls))
+        return await first, duplicate
+
+    first, duplicate = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert json.loads(duplicate.body) == first
+
+
+def test_keyed_requests_are_refused_without_the_unique_index(claims):
+    calls = []
+    claims.unique_id = False
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(keys().run("checkout", "k1", "f", counting_handler(calls)))
+    assert raised.value.status_code == 503
+    assert calls == []
+
+    # Once the index exists (manage_indexes.py) requests go through without a restart
+    claims.unique_id = True
+    assert asyncio.run(keys().run("checkout", "k1", "f", counting_handler(calls))) == {"session_id": "cs_1"}
@@ -0,0 +1,38 @@
+"""
+Highlighting of /api/search titles and snippets.
+"""
+from server import SNIPPET_CHARS, highlight_snippet, highlight_text, search_terms
+
+
+def test_title_match_near_the_end_keeps_the_whole_title():
+    title = "Faith Center Live | October 12th, 2025 - The Ten Best Ways Part 6"
+
+    assert highlight_text(title, search_terms("ways")) == (
+        "Faith Center Live | October 12th, 2025 - The Ten Best <mark>Ways</mark> Part 6"
+    )
+
+
+def test_title_marks_every_term_and_escapes_html():
+    title = "Prayer & Praise: praying <together>"
+
+    assert highlight_text(title, search_terms("pray -praise")) == (
+        "<mark>Prayer</mark> &amp; Praise: <mark>praying</mark> &lt;together&gt;"
+    )
+
+
+def test_title_without_a_match_is_escaped_as_is():
+    assert highlight_text("Q&A night", search_terms("worship")) == "Q&amp;A night"
+    assert highlight_text("Q&A night", []) == "Q&amp;A night"
+
+
+def test_snippet_is_a_window_around_the_first_match():
+    text = "intro " * 100 + "the revival begins here " + "outro " * 100
+
+    snippet = highlight_snippet(text, search_terms("revival"))
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "<mark>revival</mark>" in snippet
+    assert len(snippet) < SNIPPET_CHARS + 40
+
+
+def test_snippet_is_none_without_a_match():
+    assert highlight_snippet("Sunday service", search_terms("revival")) is None
@@ -0,0 +1,40 @@
+"""
+Finding content-store images in documents and attaching their srcsets.
+"""
+from server import UPLOADS_URL_PREFIX, attach_nested_srcsets, stored_image_digests
+
+DIGEST = "ab" + "0" * 62
+URL = f"{UPLOADS_URL_PREFIX}/ab/{DIGEST}.jpg"
+SRCSET = {"320": f"{UPLOADS_URL_PREFIX}/ab/{DIGEST}-320w.webp", "1200": URL}
+
+
+def blog(**fields):
+    return {
+        "id": "b1",
+        "image_url": None,
+        "content_blocks": [
+            {"type": "text", "content": "Welcome", "image_url": None},
+            {"type": "image", "image_url": URL},
+        ],
+        **fields,
+    }
+
+
+def test_nested_block_images_are_found():
+    assert stored_image_digests(blog()) == {URL: DIGEST}
+
+
+def test_flat_lists_and_other_urls():
+    doc = {"gallery_images": [URL, "https://example.com/a.jpg"], "image_url": "data:image/png;base64,AAAA"}
+    assert stored_image_digests(doc) == {URL: DIGEST}
+
+
+def test_urls_inside_srcsets_are_not_references():
+    assert stored_image_digests({"srcsets": {URL: SRCSET}}) == {}
+
+
+def test_srcset_is_attached_next_to_each_nested_image_url():
+    doc = blog()
+    attach_nested_srcsets(doc, {URL: SRCSET})
+    assert "srcset" not in doc["content_blocks"][0]
+    assert doc["content_blocks"][1]["srcset"] == SRCSET